@@ -7,10 +7,12 @@ import os
 import json
 import hashlib
 import logging
-from typing import Dict, Any, Optional, Union, Tuple
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Union, Tuple
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Try to import Redis, with a fallback to a simple dictionary cache
@@ -21,6 +23,55 @@ except ImportError:
     REDIS_AVAILABLE = False
     logger.warning("Redis not available, falling back to in-memory cache")
 
+# Try to import xxhash for fast cache-key hashing, with a fallback to BLAKE2
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# Try to import NumPy for vectorized similarity lookups in the semantic cache
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Try to import orjson for fast cache serialization, with a fallback to stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _serialize(data: Dict[str, Any]) -> bytes:
+    """Serialize a cached response to JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
+def _deserialize(raw: Union[str, bytes]) -> Dict[str, Any]:
+    """Deserialize a cached response from JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+# Key namespace and batching parameters for bulk Redis operations
+CACHE_KEY_PREFIX = "taxai:query:"
+CACHE_KEY_PATTERN = f"{CACHE_KEY_PREFIX}*"
+# Running count of cached entries, so stats never need to walk the keyspace
+CACHE_COUNT_KEY = "taxai:stats:query_count"
+SCAN_COUNT = 1000
+DELETE_BATCH_SIZE = 500
+
+# Request coalescing: the first caller to miss a key computes the response while
+# concurrent callers for the same key wait for it instead of calling the model
+INFLIGHT_KEY_PREFIX = "taxai:inflight:"
+INFLIGHT_LOCK_TTL = 60
+INFLIGHT_NOTIFY_TTL = 5
+
 
 class QueryCache:
     """Caches AI responses for tax law queries to improve performance."""
@@ -29,7 +80,10 @@ class QueryCache:
                  redis_host: str = "localhost", 
                  redis_port: int = 6379,
                  redis_db: int = 0,
-                 ttl: int = 3600 * 24 * 7):  # Default 1 week TTL
+                 ttl: int = 3600 * 24 * 7,  # Default 1 week TTL
+                 pool_size: int = 32,
+                 memory_cache_maxsize: int = 10_000,
+                 inflight_wait: float = 30.0):
         """
         Initialize the query cache.
         
@@ -39,18 +93,31 @@ class QueryCache:
             redis_port: Redis server port
             redis_db: Redis database number
             ttl: Time-to-live for cache entries in seconds
+            pool_size: Maximum number of pooled Redis connections
+            memory_cache_maxsize: Maximum number of entries kept by the in-memory fallback
+            inflight_wait: Seconds a caller waits for an identical in-flight query
+                before computing it itself (0 disables request coalescing)
         """
         self.ttl = ttl
+        self.memory_cache_maxsize = memory_cache_maxsize
+        self.inflight_wait = inflight_wait
+        # In-memory coalescing state: cache key -> (event, owning thread id, claim time)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
         self.use_redis = use_redis and REDIS_AVAILABLE
         
         if self.use_redis:
             try:
-                self.redis = redis.Redis(
+                # Share a bounded pool across threads; callers wait for a free
+                # connection instead of opening new sockets under load
+                pool = redis.BlockingConnectionPool(
                     host=redis_host,
                     port=redis_port,
                     db=redis_db,
-                    decode_responses=True
+                    max_connections=pool_size,
+                    timeout=2
                 )
+                self.redis = redis.Redis(connection_pool=pool)
                 # Test connection
                 self.redis.ping()
                 logger.info(f"Successfully connected to Redis at {redis_host}:{redis_port}")
@@ -59,8 +126,8 @@ class QueryCache:
                 self.use_redis = False
         
         if not self.use_redis:
-            # In-memory cache as fallback
-            self.memory_cache = {}
+            # Bounded LRU in-memory cache as fallback, storing (expiry_ts, value)
+            self.memory_cache = OrderedDict()
     
     def _generate_cache_key(self, query: str, context: Optional[str] = None) -> str:
         """
@@ -73,45 +140,228 @@ class QueryCache:
         Returns:
             A hashed cache key
         """
-        # Create a string with query and context if available
-        key_content = query.lower().strip()
+        # Cache keys are internal only, so use a fast non-cryptographic 128-bit hash
+        if XXHASH_AVAILABLE:
+            hasher = xxhash.xxh3_128()
+        else:
+            hasher = hashlib.blake2b(digest_size=16)
+        
+        # Feed the query and context into the hash piece by piece instead of
+        # building one large joined string
+        hasher.update(query.lower().strip().encode())
         
         if context:
             if isinstance(context, list):
-                # Sort to ensure consistent keys regardless of order
-                context.sort()
-                context_str = ", ".join(context)
+                # Sort a copy to ensure consistent keys regardless of order,
+                # without mutating the caller's list
+                for ref in sorted(context):
+                    hasher.update(b"\x00")
+                    hasher.update(ref.encode())
             else:
-                context_str = str(context)
-            
-            key_content += ":" + context_str
+                hasher.update(b"\x01")
+                hasher.update(str(context).encode())
         
-        # Create an MD5 hash as the cache key
-        cache_key = f"taxai:query:{hashlib.md5(key_content.encode()).hexdigest()}"
+        digest = hasher.hexdigest()
+        cache_key = f"{CACHE_KEY_PREFIX}{digest}"
         return cache_key
     
-    def get(self, query: str, context: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    def _memory_get(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """
-        Retrieve a cached response if available.
+        Look up a key in the in-memory cache, honouring TTL and LRU order.
+        
+        Args:
+            cache_key: The generated cache key
+            
+        Returns:
+            The cached response or None if missing or expired
+        """
+        entry = self.memory_cache.get(cache_key)
+        if entry is None:
+            return None
+        
+        expiry_ts, value = entry
+        if expiry_ts <= time.monotonic():
+            del self.memory_cache[cache_key]
+            return None
+        
+        self.memory_cache.move_to_end(cache_key)
+        return value
+    
+    def _memory_set(self, cache_key: str, value: Dict[str, Any], ttl: int) -> None:
+        """
+        Store a value in the in-memory cache, evicting the least recently used entry when full.
+        
+        Args:
+            cache_key: The generated cache key
+            value: The response to cache
+            ttl: Time-to-live in seconds
+        """
+        self.memory_cache[cache_key] = (time.monotonic() + ttl, value)
+        self.memory_cache.move_to_end(cache_key)
+        while len(self.memory_cache) > self.memory_cache_maxsize:
+            self.memory_cache.popitem(last=False)
+    
+    def _inflight_keys(self, cache_key: str) -> Tuple[str, str]:
+        """Get the Redis lock and notification keys for an in-flight query."""
+        inflight_key = INFLIGHT_KEY_PREFIX + cache_key[len(CACHE_KEY_PREFIX):]
+        return f"{inflight_key}:lock", f"{inflight_key}:notify"
+    
+    def _wait_for_inflight(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim a missed key for computation, or wait for the caller that already claimed it.
+        
+        Args:
+            cache_key: The generated cache key
+            
+        Returns:
+            The response computed by another caller, or None if this caller should compute it
+        """
+        if self.inflight_wait <= 0:
+            return None
+        
+        if self.use_redis:
+            lock_key, notify_key = self._inflight_keys(cache_key)
+            if self.redis.set(lock_key, os.getpid(), nx=True, ex=INFLIGHT_LOCK_TTL):
+                # Drop any wake-up left over from an earlier computation of this
+                # key so waiters only wake once this one finishes
+                self.redis.delete(notify_key)
+                return None
+            
+            # Another caller is computing this query; block until it publishes
+            if self.redis.blpop(notify_key, timeout=self.inflight_wait):
+                # Pass the wake-up on to the next waiter; popping the last token
+                # deleted the list, so the relayed one needs its own expiry
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.lpush(notify_key, 1)
+                pipe.expire(notify_key, INFLIGHT_NOTIFY_TTL)
+                pipe.execute()
+            cached_data = self.redis.get(cache_key)
+            return _deserialize(cached_data) if cached_data else None
+        
+        now = time.monotonic()
+        with self._inflight_lock:
+            inflight = self._inflight.get(cache_key)
+            if inflight is None or inflight[2] + INFLIGHT_LOCK_TTL <= now:
+                if inflight is not None:
+                    # The previous owner never finished; reclaim its key
+                    inflight[0].set()
+                self._inflight[cache_key] = (threading.Event(), threading.get_ident(), now)
+                return None
+        
+        event, owner, _ = inflight
+        if owner == threading.get_ident():
+            # Never wait on a computation this thread is responsible for
+            return None
+        if not event.wait(self.inflight_wait):
+            # The owner did not publish in time; drop its claim so later misses
+            # on this key stop blocking on it
+            with self._inflight_lock:
+                if self._inflight.get(cache_key) is inflight:
+                    del self._inflight[cache_key]
+            event.set()
+        return self._memory_get(cache_key)
+    
+    def _finish_inflight(self, cache_key: str, pipe=None) -> None:
+        """
+        Wake up callers waiting on an in-flight query.
+        
+        Args:
+            cache_key: The generated cache key
+            pipe: Optional Redis pipeline to queue the commands on; the caller executes it
+        """
+        if self.use_redis:
+            lock_key, notify_key = self._inflight_keys(cache_key)
+            own_pipe = pipe is None
+            if own_pipe:
+                pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(lock_key)
+            pipe.lpush(notify_key, 1)
+            pipe.expire(notify_key, INFLIGHT_NOTIFY_TTL)
+            if own_pipe:
+                pipe.execute()
+        else:
+            with self._inflight_lock:
+                inflight = self._inflight.pop(cache_key, None)
+            if inflight is not None:
+                inflight[0].set()
+    
+    def release(self, query: str, context: Optional[str] = None) -> None:
+        """
+        Give up computing a query claimed by get_or_claim(), e.g. after an error.
+        
+        Waiting callers are woken up and compute the response themselves.
         
         Args:
             query: The preprocessed tax law query
             context: Optional context used for the query
+        """
+        self._finish_inflight(self._generate_cache_key(query, context))
+    
+    def _lookup(self, cache_key: str, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cache key without claiming or waiting on it.
+        
+        Args:
+            cache_key: The generated cache key
+            query: The preprocessed tax law query, for logging
             
         Returns:
             The cached response or None if not found
         """
-        cache_key = self._generate_cache_key(query, context)
-        
         if self.use_redis:
             cached_data = self.redis.get(cache_key)
             if cached_data:
                 logger.info(f"Cache hit for query: {query[:50]}...")
-                return json.loads(cached_data)
+                return _deserialize(cached_data)
         else:
-            if cache_key in self.memory_cache:
+            cached_response = self._memory_get(cache_key)
+            if cached_response is not None:
                 logger.info(f"Cache hit for query: {query[:50]}...")
-                return self.memory_cache[cache_key]
+                return cached_response
+        return None
+    
+    def get(self, query: str, context: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a cached response if available.
+        
+        Never blocks on other callers; use get_or_claim() to coalesce concurrent misses.
+        
+        Args:
+            query: The preprocessed tax law query
+            context: Optional context used for the query
+            
+        Returns:
+            The cached response or None if not found
+        """
+        cached_response = self._lookup(self._generate_cache_key(query, context), query)
+        if cached_response is None:
+            logger.info(f"Cache miss for query: {query[:50]}...")
+        return cached_response
+    
+    def get_or_claim(self, query: str, context: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a cached response, or claim the query for computation on a miss.
+        
+        On a miss, the first caller for a key gets None and must compute the
+        response and call set(), or release() on failure. Concurrent callers
+        for the same key wait up to inflight_wait seconds for that response.
+        
+        Args:
+            query: The preprocessed tax law query
+            context: Optional context used for the query
+            
+        Returns:
+            The cached or coalesced response, or None if this caller should compute it
+        """
+        cache_key = self._generate_cache_key(query, context)
+        cached_response = self._lookup(cache_key, query)
+        if cached_response is not None:
+            return cached_response
+        
+        coalesced_response = self._wait_for_inflight(cache_key)
+        if coalesced_response is not None:
+            logger.info(f"Coalesced in-flight query: {query[:50]}...")
+            return coalesced_response
         
         logger.info(f"Cache miss for query: {query[:50]}...")
         return None
@@ -134,15 +384,75 @@ class QueryCache:
             ttl = self.ttl
         
         if self.use_redis:
-            # Serialize the response to JSON
-            json_data = json.dumps(response)
-            self.redis.setex(cache_key, ttl, json_data)
+            # Write only if absent (NX) so repeated warm-ups skip redundant writes,
+            # and wake coalesced waiters in the same round trip
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(cache_key, _serialize(response), ex=ttl, nx=True)
+            self._finish_inflight(cache_key, pipe)
+            stored = pipe.execute()[0]
+            if stored:
+                self.redis.incr(CACHE_COUNT_KEY)
         else:
             # Store in memory
-            self.memory_cache[cache_key] = response
+            self._memory_set(cache_key, response, ttl)
+            self._finish_inflight(cache_key)
         
         logger.info(f"Cached response for query: {query[:50]}... (TTL: {ttl}s)")
     
+    def get_many(self, queries: List[Tuple[str, Optional[str]]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Retrieve cached responses for several queries in one round trip.
+        
+        Args:
+            queries: List of (query, context) tuples
+            
+        Returns:
+            List of cached responses (or None for misses), in input order
+        """
+        if not queries:
+            return []
+        
+        cache_keys = [self._generate_cache_key(query, context) for query, context in queries]
+        
+        if self.use_redis:
+            cached_items = self.redis.mget(cache_keys)
+            results = [_deserialize(item) if item else None for item in cached_items]
+        else:
+            results = [self._memory_get(cache_key) for cache_key in cache_keys]
+        
+        hits = sum(1 for result in results if result is not None)
+        logger.info(f"Batch cache lookup: {hits}/{len(results)} hits")
+        return results
+    
+    def set_many(self, items: List[Tuple[str, Dict[str, Any], Optional[str]]],
+                 ttl: Optional[int] = None) -> None:
+        """
+        Cache several responses in one round trip.
+        
+        Args:
+            items: List of (query, response, context) tuples
+            ttl: Optional custom TTL (time-to-live) in seconds
+        """
+        if not items:
+            return
+        
+        # Use the instance TTL if none provided
+        if ttl is None:
+            ttl = self.ttl
+        
+        if self.use_redis:
+            pipe = self.redis.pipeline(transaction=False)
+            for query, response, context in items:
+                pipe.set(self._generate_cache_key(query, context), _serialize(response), ex=ttl, nx=True)
+            stored = sum(1 for result in pipe.execute() if result)
+            if stored:
+                self.redis.incrby(CACHE_COUNT_KEY, stored)
+        else:
+            for query, response, context in items:
+                self._memory_set(self._generate_cache_key(query, context), response, ttl)
+        
+        logger.info(f"Cached {len(items)} responses (TTL: {ttl}s)")
+    
     def invalidate(self, query: str, context: Optional[str] = None) -> bool:
         """
         Invalidate a cached response.
@@ -158,6 +468,8 @@ class QueryCache:
         
         if self.use_redis:
             deleted = self.redis.delete(cache_key)
+            if deleted:
+                self.redis.decr(CACHE_COUNT_KEY)
             return deleted > 0
         else:
             if cache_key in self.memory_cache:
@@ -165,16 +477,40 @@ class QueryCache:
                 return True
             return False
     
+    def _unlink_batch(self, keys: List[str]) -> int:
+        """
+        Remove a batch of keys from Redis in a single round trip.
+        
+        Args:
+            keys: Cache keys to remove
+            
+        Returns:
+            Number of keys removed
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.unlink(*keys)
+        removed, = pipe.execute()
+        return removed
+    
     def clear_all(self) -> None:
         """
         Clear all cached responses.
         """
         if self.use_redis:
-            # Get all keys with our prefix and delete them
-            keys = self.redis.keys("taxai:query:*")
-            if keys:
-                self.redis.delete(*keys)
-                logger.info(f"Cleared {len(keys)} cached queries from Redis")
+            # Incrementally SCAN for our keys and UNLINK them in pipelined batches,
+            # so Redis is never blocked by KEYS/DEL on a large cache
+            cleared = 0
+            batch = []
+            for key in self.redis.scan_iter(match=CACHE_KEY_PATTERN, count=SCAN_COUNT):
+                batch.append(key)
+                if len(batch) >= DELETE_BATCH_SIZE:
+                    cleared += self._unlink_batch(batch)
+                    batch = []
+            if batch:
+                cleared += self._unlink_batch(batch)
+            self.redis.delete(CACHE_COUNT_KEY)
+            if cleared:
+                logger.info(f"Cleared {cleared} cached queries from Redis")
         else:
             cache_size = len(self.memory_cache)
             self.memory_cache.clear()
@@ -184,14 +520,17 @@ class QueryCache:
         """
         Get cache statistics.
         
+        For Redis the size comes from a running counter (O(1)). Entries that
+        expire via TTL are not subtracted until the next clear_all, so the
+        reported size is an upper bound.
+        
         Returns:
             Dictionary with cache statistics
         """
         if self.use_redis:
-            keys = self.redis.keys("taxai:query:*")
             return {
                 "type": "redis",
-                "size": len(keys),
+                "size": int(self.redis.get(CACHE_COUNT_KEY) or 0),
                 "host": self.redis.connection_pool.connection_kwargs.get("host", "unknown"),
                 "port": self.redis.connection_pool.connection_kwargs.get("port", "unknown")
             }
@@ -202,11 +541,149 @@ class QueryCache:
             }
 
 
+class SemanticCache:
+    """
+    In-process cache keyed by query embeddings rather than exact query text.
+    
+    Paraphrases of an already-answered question land close together in embedding
+    space, so a lookup returns the stored response whose query embedding has the
+    highest cosine similarity to the new one, provided it clears the threshold and
+    was produced with the same context. Embeddings are kept L2-normalized in one
+    preallocated matrix so a lookup is a single matrix-vector product.
+    """
+    
+    def __init__(self, threshold: float = 0.95, maxsize: int = 10_000, enabled: bool = True):
+        """
+        Initialize the semantic cache.
+        
+        Args:
+            threshold: Minimum cosine similarity for a cached response to be reused
+            maxsize: Maximum number of cached entries before least recently used eviction
+            enabled: Whether lookups and stores are performed at all
+        """
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.enabled = enabled and NUMPY_AVAILABLE
+        self._lock = threading.Lock()
+        self.clear()
+    
+    @staticmethod
+    def _context_fingerprint(context: Optional[Union[str, List[str]]]) -> str:
+        """Build an order-independent string identifying the context of a query."""
+        if isinstance(context, list):
+            return "\x00".join(sorted(context))
+        return context or ""
+    
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._embeddings = None  # (maxsize, dim) matrix, allocated on first store
+            self._context_ids = None  # hash of each row's context, for vectorized filtering
+            self._last_used = None  # logical clock per row, for LRU eviction
+            self._contexts: List[str] = []
+            self._responses: List[Dict[str, Any]] = []
+            self._clock = 0
+    
+    def _normalize(self, embedding) -> "np.ndarray":
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def get(self, embedding, context: Optional[Union[str, List[str]]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached response for a semantically equivalent query.
+        
+        Args:
+            embedding: Embedding vector of the preprocessed query
+            context: Context the response must have been generated with
+            
+        Returns:
+            The cached response or None if no entry is similar enough
+        """
+        if not self.enabled:
+            return None
+        
+        fingerprint = self._context_fingerprint(context)
+        query_vector = self._normalize(embedding)
+        
+        with self._lock:
+            size = len(self._responses)
+            if size == 0 or query_vector.shape[0] != self._embeddings.shape[1]:
+                return None
+            
+            similarities = self._embeddings[:size] @ query_vector
+            similarities[self._context_ids[:size] != hash(fingerprint)] = -np.inf
+            best = int(np.argmax(similarities))
+            
+            if similarities[best] < self.threshold or self._contexts[best] != fingerprint:
+                return None
+            
+            self._clock += 1
+            self._last_used[best] = self._clock
+            logger.info(f"Semantic cache hit (similarity {similarities[best]:.3f})")
+            return self._responses[best]
+    
+    def set(self, embedding, response: Dict[str, Any],
+            context: Optional[Union[str, List[str]]] = None) -> None:
+        """
+        Store a response under its query embedding.
+        
+        Args:
+            embedding: Embedding vector of the preprocessed query
+            response: The generated response data
+            context: Context the response was generated with
+        """
+        if not self.enabled or self.maxsize <= 0:
+            return
+        
+        fingerprint = self._context_fingerprint(context)
+        query_vector = self._normalize(embedding)
+        
+        with self._lock:
+            if self._embeddings is None or self._embeddings.shape[1] != query_vector.shape[0]:
+                self._embeddings = np.zeros((self.maxsize, query_vector.shape[0]), dtype=np.float32)
+                self._context_ids = np.zeros(self.maxsize, dtype=np.int64)
+                self._last_used = np.zeros(self.maxsize, dtype=np.int64)
+                self._contexts = []
+                self._responses = []
+            
+            size = len(self._responses)
+            if size < self.maxsize:
+                row = size
+                self._contexts.append(fingerprint)
+                self._responses.append(response)
+            else:
+                # Overwrite the least recently used row, keeping all arrays in step
+                row = int(np.argmin(self._last_used))
+                self._contexts[row] = fingerprint
+                self._responses[row] = response
+            
+            self._clock += 1
+            self._embeddings[row] = query_vector
+            self._context_ids[row] = hash(fingerprint)
+            self._last_used[row] = self._clock
+    
+    def __len__(self) -> int:
+        return len(self._responses)
+
+
 # Create a singleton cache instance
 query_cache = QueryCache(
     use_redis=os.getenv("USE_REDIS_CACHE", "false").lower() == "true",
     redis_host=os.getenv("REDIS_HOST", "localhost"),
     redis_port=int(os.getenv("REDIS_PORT", "6379")),
     redis_db=int(os.getenv("REDIS_DB", "0")),
-    ttl=int(os.getenv("CACHE_TTL", str(3600 * 24 * 7)))  # Default 1 week TTL
+    ttl=int(os.getenv("CACHE_TTL", str(3600 * 24 * 7))),  # Default 1 week TTL
+    pool_size=int(os.getenv("REDIS_POOL_SIZE", "32")),
+    memory_cache_maxsize=int(os.getenv("MEMORY_CACHE_MAXSIZE", "10000")),
+    inflight_wait=float(os.getenv("CACHE_INFLIGHT_WAIT", "30"))
+)
+
+
+# Create a singleton semantic cache instance
+semantic_cache = SemanticCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+    maxsize=int(os.getenv("SEMANTIC_CACHE_MAXSIZE", "10000")),
+    enabled=os.getenv("USE_SEMANTIC_CACHE", "true").lower() == "true"
 )
@@ -3,23 +3,87 @@ Model loader for the AI-powered tax law system.
 This module uses Hugging Face's API for model inference.
 """
 
-import os
+import copy
+import importlib.util
+import queue
+import threading
+import time
 import requests
 import torch
-import sys
-from typing import Dict, List, Union, Optional
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Union, Optional
+from requests.adapters import HTTPAdapter
 from transformers import AutoTokenizer, AutoModelForCausalLM
+from urllib3.util.retry import Retry
 
 # Import centralized configuration
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
     USE_MISTRAL, 
     CURRENT_MODEL,
     HUGGINGFACE_API_KEY,
     USE_HUGGINGFACE_API,
     USE_CUDA,
-    QUANTIZATION_BITS
+    QUANTIZATION_BITS,
+    USE_TORCH_COMPILE,
+    GENERATION_BATCH_SIZE,
+    GENERATION_BATCH_WAIT_MS
 )
+from ai_engine.prompts import get_system_prompt, PROMPT_SUFFIX_MISTRAL, PROMPT_SUFFIX_LLAMA
+
+class _GenerationBatcher:
+    """Collects concurrent generation requests into batched model.generate calls."""
+    
+    def __init__(self, generate_batch: Callable[[List[str], int], List[str]],
+                 max_batch_size: int, max_wait: float):
+        """
+        Start the background batching thread.
+        
+        Args:
+            generate_batch: Callable generating responses for a list of prompts
+            max_batch_size: Maximum number of prompts per generate call
+            max_wait: Seconds to wait for more requests after the first arrives
+        """
+        self._generate_batch = generate_batch
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="generation-batcher", daemon=True)
+        self._thread.start()
+    
+    def submit(self, prompt: str, max_length: int) -> str:
+        """Queue a prompt and block until its response is generated."""
+        future = Future()
+        self._queue.put((prompt, max_length, future))
+        return future.result()
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # Requests with different length limits cannot share a generate call
+            by_length = {}
+            for item in batch:
+                by_length.setdefault(item[1], []).append(item)
+            
+            for max_length, items in by_length.items():
+                try:
+                    responses = self._generate_batch([prompt for prompt, _, _ in items], max_length)
+                except Exception as e:
+                    for _, _, future in items:
+                        future.set_exception(e)
+                    continue
+                for (_, _, future), response in zip(items, responses):
+                    future.set_result(response)
+
 
 class ModelLoader:
     """Handles loading and optimization of LLM for tax law processing."""
@@ -29,14 +93,61 @@ class ModelLoader:
         self.tokenizer = None
         self.api_url = "https://api-inference.huggingface.co/models/"
         self.headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"}
+        # Persistent keep-alive session so API calls reuse TCP/TLS connections;
+        # rate-limited or overloaded responses are retried with exponential backoff
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 503],
+                allowed_methods=None,
+                raise_on_status=False
+            )
+        ))
+        # Token ids of the static system prompt, computed once at load time
+        self._sys_prompt = get_system_prompt(USE_MISTRAL)
+        self._sys_prefix_ids = None
+        # Attention KV cache for the system prompt, prefilled once at load time
+        self._sys_past = None
+        # Micro-batcher for concurrent local generation requests
+        self._batcher = None
+        # Requests run on worker threads, so concurrent cold starts must load once
+        self._load_lock = threading.Lock()
+        self._loaded = False
         
+    def _load_tokenizer(self):
+        """Load the Rust-backed fast tokenizer for the current model."""
+        tokenizer = AutoTokenizer.from_pretrained(CURRENT_MODEL, use_fast=True)
+        if not tokenizer.is_fast:
+            print(f"Warning: no fast tokenizer available for {CURRENT_MODEL}, falling back to the Python tokenizer")
+        return tokenizer
+    
     def load_model(self):
+        """
+        Load the model once, even when called from several threads at the same time.
+        
+        Returns:
+            True if the model is ready to generate responses
+        """
+        # Double-checked so concurrent first requests load the model only once
+        if self._loaded:
+            return True
+        with self._load_lock:
+            if not self._loaded:
+                self._loaded = self._load_model()
+        return self._loaded
+    
+    def _load_model(self):
         """Load the model - either using the Hugging Face API or locally."""
         if USE_HUGGINGFACE_API:
             try:
                 # Load tokenizer locally for text processing
                 print(f"Loading tokenizer for {CURRENT_MODEL}")
-                self.tokenizer = AutoTokenizer.from_pretrained(CURRENT_MODEL)
+                self.tokenizer = self._load_tokenizer()
                 print(f"Tokenizer loaded successfully!")
                 
                 # Test the API connection
@@ -64,34 +175,85 @@ class ModelLoader:
             print(f"Loading {CURRENT_MODEL} locally...")
             
             try:
-                # Load tokenizer
-                self.tokenizer = AutoTokenizer.from_pretrained(CURRENT_MODEL)
+                # Load tokenizer; causal LMs need left padding for batched generation
+                self.tokenizer = self._load_tokenizer()
+                self.tokenizer.padding_side = "left"
+                if self.tokenizer.pad_token is None:
+                    self.tokenizer.pad_token = self.tokenizer.eos_token
+                
+                # Pre-tokenize the static system prompt so each request only
+                # tokenizes the user-specific part of the prompt
+                self._sys_prefix_ids = self.tokenizer(
+                    self._sys_prompt, return_tensors="pt"
+                ).input_ids
+                if not self._prefix_concat_matches():
+                    print("System prompt tokenizes differently in context, tokenizing full prompts")
+                    self._sys_prefix_ids = None
                 
                 # Device configuration
                 device = "cuda" if torch.cuda.is_available() and USE_CUDA else "cpu"
                 bits = 4 if device == "cuda" else QUANTIZATION_BITS
                 
+                # Ampere (sm80) and newer GPUs run bf16 natively and support FlashAttention-2
+                ampere_or_newer = device == "cuda" and torch.cuda.get_device_capability()[0] >= 8
+                compute_dtype = torch.bfloat16 if ampere_or_newer else torch.float16
+                
                 # Configure quantization for model loading
                 quantization_config = None
                 if bits == 4 and device == "cuda":
                     from transformers import BitsAndBytesConfig
                     quantization_config = BitsAndBytesConfig(
                         load_in_4bit=True,
-                        bnb_4bit_compute_dtype=torch.float16,
-                        bnb_4bit_quant_type="nf4"
+                        bnb_4bit_compute_dtype=compute_dtype,
+                        bnb_4bit_quant_type="nf4",
+                        bnb_4bit_quant_storage=torch.uint8
                     )
                 
+                model_kwargs = {}
+                if ampere_or_newer and importlib.util.find_spec("flash_attn") is not None:
+                    model_kwargs["attn_implementation"] = "flash_attention_2"
+                    print("Using FlashAttention-2 for attention layers")
+                
                 # Load model with quantization if on GPU
                 self.model = AutoModelForCausalLM.from_pretrained(
                     CURRENT_MODEL,
                     quantization_config=quantization_config,
                     device_map="auto" if device == "cuda" else None,
-                    torch_dtype=torch.float16 if bits == 16 else None
+                    torch_dtype=compute_dtype if bits == 16 or model_kwargs else None,
+                    **model_kwargs
                 )
                 
                 # Move model to CPU if not using CUDA
                 if device == "cpu":
                     self.model = self.model.to(device)
+                
+                # Prefill the KV cache for the system prompt once so each request
+                # only runs prefill over its own tokens
+                if self._sys_prefix_ids is not None:
+                    self._sys_past = self._prefill_system_prompt()
+                
+                # Optionally compile the forward pass on GPU; "reduce-overhead" captures
+                # CUDA graphs so each decoded token avoids Python and kernel-launch
+                # overhead. Prompt lengths and the KV cache are not fixed here, so
+                # this only pays off for workloads with few distinct shapes
+                if device == "cuda" and USE_TORCH_COMPILE and hasattr(torch, "compile"):
+                    try:
+                        self.model.forward = torch.compile(
+                            self.model.forward,
+                            mode="reduce-overhead",
+                            fullgraph=False
+                        )
+                        print("Model forward pass compiled with torch.compile")
+                    except Exception as e:
+                        print(f"torch.compile unavailable, using eager mode: {str(e)}")
+                
+                # Batch concurrent requests into a single generate call
+                if GENERATION_BATCH_SIZE > 1 and self._batcher is None:
+                    self._batcher = _GenerationBatcher(
+                        self._generate_local,
+                        max_batch_size=GENERATION_BATCH_SIZE,
+                        max_wait=GENERATION_BATCH_WAIT_MS / 1000
+                    )
                     
                 print(f"Model loaded successfully!")
                 return True
@@ -100,6 +262,67 @@ class ModelLoader:
                 print(f"Error loading model: {str(e)}")
                 return False
     
+    def _prefill_system_prompt(self):
+        """
+        Run the model over the system prompt and keep its attention KV cache.
+        
+        Returns:
+            The past_key_values for the system prompt, or None if unsupported
+        """
+        try:
+            with torch.no_grad():
+                outputs = self.model(
+                    self._sys_prefix_ids.to(self.model.device),
+                    use_cache=True
+                )
+            return outputs.past_key_values
+        except Exception as e:
+            print(f"System prompt KV cache disabled: {str(e)}")
+            return None
+    
+    def _prefix_concat_matches(self) -> bool:
+        """
+        Check that the system prompt ids plus the separately tokenized rest of a
+        prompt equal the ids of the whole prompt.
+        
+        SentencePiece tokenizers mark the start of every text they encode, so
+        for them the two can differ. The user part of every prompt starts with a
+        word ("Relevant" or "Question"), so one sample prompt settles it.
+        
+        Returns:
+            True if the cached system prompt ids can be reused
+        """
+        suffix = PROMPT_SUFFIX_MISTRAL if USE_MISTRAL else PROMPT_SUFFIX_LLAMA
+        user_text = f"Question: What is the standard deduction?{suffix}"
+        prefix_ids = self.tokenizer(self._sys_prompt)["input_ids"]
+        user_ids = self.tokenizer(user_text, add_special_tokens=False)["input_ids"]
+        return prefix_ids + user_ids == self.tokenizer(self._sys_prompt + user_text)["input_ids"]
+    
+    def _has_cached_prefix(self, prompt: str) -> bool:
+        """Check whether a prompt starts with the pre-tokenized system prompt."""
+        return self._sys_prefix_ids is not None and prompt.startswith(self._sys_prompt)
+    
+    def _tokenize_prompt(self, prompt: str) -> Dict[str, torch.Tensor]:
+        """
+        Tokenize a prompt, reusing the cached system prompt token ids when possible.
+        
+        Args:
+            prompt: The full formatted prompt
+            
+        Returns:
+            Dictionary with input_ids and attention_mask tensors
+        """
+        if self._has_cached_prefix(prompt):
+            user_ids = self.tokenizer(
+                prompt[len(self._sys_prompt):],
+                add_special_tokens=False,
+                return_tensors="pt"
+            ).input_ids
+            input_ids = torch.cat([self._sys_prefix_ids, user_ids], dim=1)
+            return {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+        
+        return dict(self.tokenizer(prompt, return_tensors="pt"))
+    
     def generate_response(self, query: str, max_length: int = 512) -> str:
         """
         Generate a response based on the input query.
@@ -116,9 +339,6 @@ class ModelLoader:
                 raise ValueError("Tokenizer not loaded. Call load_model() first.")
             
             try:
-                # Tokenize input to determine input length for response processing
-                inputs = self.tokenizer(query, return_tensors="pt")
-                
                 # Prepare payload for Hugging Face API
                 payload = {
                     "inputs": query,
@@ -132,10 +352,10 @@ class ModelLoader:
                 }
                 
                 # Make API request
-                response = requests.post(
+                response = self._session.post(
                     f"{self.api_url}{CURRENT_MODEL}",
-                    headers=self.headers,
-                    json=payload
+                    json=payload,
+                    timeout=60
                 )
                 
                 # Handle API response
@@ -149,19 +369,17 @@ class ModelLoader:
                         full_response = result.get('generated_text', '')
                     
                     # Process the response based on model type
-                    if USE_MISTRAL:
+                    if USE_MISTRAL and "[/INST]" in full_response:
                         # Mistral format - extract content after [/INST]
-                        if "[/INST]" in full_response:
-                            response_text = full_response.split("[/INST]")[-1].strip()
-                        else:
-                            # Fallback to standard extraction
-                            response_text = full_response[len(self.tokenizer.decode(inputs.input_ids[0], skip_special_tokens=True)):].strip()
-                    elif "<|assistant|>" in full_response:
+                        response_text = full_response.split("[/INST]")[-1].strip()
+                    elif not USE_MISTRAL and "<|assistant|>" in full_response:
                         # Llama 3.1 format - extract after <|assistant|>
                         response_text = full_response.split("<|assistant|>")[-1].strip()
+                    elif full_response.startswith(query):
+                        # The API echoes the prompt text verbatim, so strip it as a string
+                        response_text = full_response[len(query):].strip()
                     else:
-                        # Generic extraction for other models
-                        response_text = full_response[len(self.tokenizer.decode(inputs.input_ids[0], skip_special_tokens=True)):].strip()
+                        response_text = full_response.strip()
                     
                     return response_text
                 else:
@@ -178,41 +396,84 @@ class ModelLoader:
             if not self.model or not self.tokenizer:
                 raise ValueError("Model not loaded. Call load_model() first.")
             
-            # Tokenize input
-            inputs = self.tokenizer(query, return_tensors="pt")
-            if torch.cuda.is_available() and USE_CUDA:
-                inputs = {k: v.cuda() for k, v in inputs.items()}
-            
-            # Generate response
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_length=max_length,
-                    do_sample=True,
-                    temperature=0.7,
-                    top_p=0.9,
-                    num_return_sequences=1
-                )
+            if self._batcher is not None:
+                return self._batcher.submit(query, max_length)
+            return self._generate_local([query], max_length)[0]
+    
+    def _generate_local(self, prompts: List[str], max_length: int) -> List[str]:
+        """
+        Generate responses for one or more prompts with the local model.
+        
+        Args:
+            prompts: Formatted prompts to generate responses for
+            max_length: Maximum number of tokens to generate per response
             
-            # Decode and return response
-            full_response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        Returns:
+            The generated text responses, in prompt order
+        """
+        generate_kwargs = {}
+        if len(prompts) == 1:
+            # Tokenize input
+            inputs = self._tokenize_prompt(prompts[0])
             
-            # For instruction-tuned models, extract just the assistant's response
-            if USE_MISTRAL:
-                # Mistral format - extract content after [/INST]
-                if "[/INST]" in full_response:
-                    response = full_response.split("[/INST]")[-1].strip()
-                else:
-                    # Fallback to standard extraction
-                    response = full_response[len(self.tokenizer.decode(inputs.input_ids[0], skip_special_tokens=True)):].strip()
-            elif "<|assistant|>" in full_response:
-                # Llama 3.1 format - extract after <|assistant|>
-                response = full_response.split("<|assistant|>")[-1].strip()
-            else:
-                # Generic extraction for other models
-                response = full_response[len(self.tokenizer.decode(inputs.input_ids[0], skip_special_tokens=True)):].strip()
+            # Reuse the prefilled system prompt KV cache; generate() extends the
+            # cache in place, so each request gets its own copy
+            if self._sys_past is not None and self._has_cached_prefix(prompts[0]):
+                generate_kwargs["past_key_values"] = copy.deepcopy(self._sys_past)
+        else:
+            # Left-padded batch with attention masks
+            inputs = dict(self.tokenizer(prompts, return_tensors="pt", padding=True))
+        
+        if torch.cuda.is_available() and USE_CUDA:
+            inputs = {k: v.cuda() for k, v in inputs.items()}
+        
+        # Generate response
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                **generate_kwargs,
+                # Limit new tokens rather than total length, so a prompt's answer
+                # does not shrink when it shares a padded batch with longer prompts
+                max_new_tokens=max_length,
+                do_sample=True,
+                temperature=0.7,
+                top_p=0.9,
+                num_return_sequences=1
+            )
+        
+        # Decode and return responses
+        return [
+            self._extract_response(
+                self.tokenizer.decode(output, skip_special_tokens=True),
+                input_ids
+            )
+            for output, input_ids in zip(outputs, inputs["input_ids"])
+        ]
+    
+    def _extract_response(self, full_response: str, input_ids: torch.Tensor) -> str:
+        """
+        Strip the prompt from a decoded generation, leaving the assistant's response.
+        
+        Args:
+            full_response: Decoded prompt plus completion
+            input_ids: Token ids of the prompt
             
-            return response
+        Returns:
+            The assistant's response text
+        """
+        # For instruction-tuned models, extract just the assistant's response
+        if USE_MISTRAL:
+            # Mistral format - extract content after [/INST]
+            if "[/INST]" in full_response:
+                return full_response.split("[/INST]")[-1].strip()
+            # Fallback to standard extraction
+            return full_response[len(self.tokenizer.decode(input_ids, skip_special_tokens=True)):].strip()
+        elif "<|assistant|>" in full_response:
+            # Llama 3.1 format - extract after <|assistant|>
+            return full_response.split("<|assistant|>")[-1].strip()
+        else:
+            # Generic extraction for other models
+            return full_response[len(self.tokenizer.decode(input_ids, skip_special_tokens=True)):].strip()
 
 
 # Create a singleton instance
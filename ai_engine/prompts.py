@@ -0,0 +1,39 @@
+"""
+Prompt templates for the AI-powered tax law system.
+Shared by the query processor (prompt formatting) and the model loader (prefix tokenization).
+"""
+
+_TAX_EXPERT_INSTRUCTIONS = (
+    "You are a tax law expert assistant providing accurate, helpful information about tax laws, "
+    "regulations, and IRS policies. Answer tax-related questions with precise, factual information. "
+    "Include relevant tax code citations and IRS publication references when applicable. "
+    "Provide clear explanations that are accessible to non-experts."
+)
+
+# Mistral instruction format: system instructions are sent inside the first [INST] block
+SYSTEM_PROMPT_MISTRAL = f"<s>[INST] {_TAX_EXPERT_INSTRUCTIONS}\n\n"
+PROMPT_SUFFIX_MISTRAL = "[/INST]"
+
+# Llama 3.1 instruction format
+SYSTEM_PROMPT_LLAMA = (
+    "<|system|>\n"
+    f"        {_TAX_EXPERT_INSTRUCTIONS}\n"
+    "        </|system|>\n"
+    "\n"
+    "        <|user|>\n"
+    "        "
+)
+PROMPT_SUFFIX_LLAMA = "\n</|user|>\n\n<|assistant|>"
+
+
+def get_system_prompt(use_mistral: bool) -> str:
+    """
+    Get the static system prompt prefix for the configured model family.
+
+    Args:
+        use_mistral: Whether the Mistral instruction format is in use
+
+    Returns:
+        The system prompt prefix that every formatted prompt starts with
+    """
+    return SYSTEM_PROMPT_MISTRAL if use_mistral else SYSTEM_PROMPT_LLAMA
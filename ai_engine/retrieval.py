@@ -3,18 +3,19 @@ Retrieval component for the AI-powered tax law system.
 This module integrates the RAG system with the AI query processor.
 """
 
-import os
-import sys
-from typing import List, Dict, Any
-
-# Import centralized configuration
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 
 # Import the RAG system
 from rag.rag_system import TaxLawRAG
 
 # Create a singleton instance of the RAG system
 _rag_instance = None
+_rag_lock = threading.Lock()
+
+# Number of distinct queries whose embeddings and formatted context are memoized
+RETRIEVAL_CACHE_SIZE = 2048
 
 def get_rag_system(reload=False) -> TaxLawRAG:
     """
@@ -29,14 +30,33 @@ def get_rag_system(reload=False) -> TaxLawRAG:
     global _rag_instance
     
     if _rag_instance is None or reload:
-        _rag_instance = TaxLawRAG(
-            db_path="./data/tax_law_db",
-            collection_name="tax_laws",
-            embedding_model_name="all-MiniLM-L6-v2"
-        )
+        # Double-checked so concurrent first requests build the RAG system only once
+        with _rag_lock:
+            if _rag_instance is None or reload:
+                _rag_instance = TaxLawRAG(
+                    db_path="./data/tax_law_db",
+                    collection_name="tax_laws",
+                    embedding_model_name="all-MiniLM-L6-v2"
+                )
+                # Memoized results belong to the previous index
+                embed_query.cache_clear()
+                _retrieve_context_cached.cache_clear()
     
     return _rag_instance
 
+@lru_cache(maxsize=RETRIEVAL_CACHE_SIZE)
+def embed_query(query: str):
+    """
+    Embed a query with the RAG system's sentence transformer.
+    
+    Args:
+        query: The tax-related query
+        
+    Returns:
+        Normalized embedding vector for the query
+    """
+    return get_rag_system().embedding_model.encode(query, normalize_embeddings=True)
+
 def retrieve_tax_laws(query: str, n_results: int = 3) -> List[Dict[str, Any]]:
     """
     Retrieve relevant tax law documents based on the query.
@@ -56,35 +76,43 @@ def retrieve_tax_laws(query: str, n_results: int = 3) -> List[Dict[str, Any]]:
     # Format for LLM context
     return results
 
-def retrieve_context_for_query(query: str, n_results: int = 3) -> List[str]:
+class _NoContextFound(Exception):
+    """Raised so that queries without results are not memoized."""
+
+@lru_cache(maxsize=RETRIEVAL_CACHE_SIZE)
+def _retrieve_context_cached(query: str, n_results: int) -> Tuple[str, ...]:
+    """Memoized body of retrieve_context_for_query; raises _NoContextFound on no results."""
+    # Get the raw document results
+    results = retrieve_tax_laws(query, n_results)
+    if not results:
+        raise _NoContextFound()
+    
+    # Format each reference with its metadata (if available) for LLM consumption,
+    # looking the metadata dict up once per result
+    return tuple(
+        f"{metadata.get('title', 'Untitled')} ({metadata.get('source', 'Unknown source')}, "
+        f"{metadata.get('year', '')}): {result['content']}"
+        for result in results
+        for metadata in (result.get('metadata') or {},)
+    )
+
+def retrieve_context_for_query(query: str, n_results: int = 3) -> Tuple[str, ...]:
     """
     Retrieve relevant tax law context as formatted strings ready for the LLM.
     
+    Results are memoized per (query, n_results), so repeat queries skip the
+    embedding pass and the vector store lookup. The memo is cleared whenever
+    the RAG system is reloaded. Empty results are not memoized, so a query
+    asked before its documents were indexed is retried on the next call.
+    
     Args:
         query: The tax-related query
         n_results: Number of relevant documents to retrieve
         
     Returns:
-        List of formatted context strings
+        Tuple of formatted context strings
     """
-    # Get the raw document results
-    results = retrieve_tax_laws(query, n_results)
-    
-    # Format the documents for LLM consumption
-    formatted_context = []
-    
-    for result in results:
-        # Get document content
-        content = result['content']
-        
-        # Get metadata (if available)
-        metadata = result.get('metadata', {})
-        source = metadata.get('source', 'Unknown source')
-        title = metadata.get('title', 'Untitled')
-        year = metadata.get('year', '')
-        
-        # Format the reference with metadata
-        reference = f"{title} ({source}, {year}): {content}"
-        formatted_context.append(reference)
-    
-    return formatted_context
+    try:
+        return _retrieve_context_cached(query, n_results)
+    except _NoContextFound:
+        return ()
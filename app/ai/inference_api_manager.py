@@ -8,23 +8,62 @@ or when running on hardware with limited resources.
 Usage requires a Hugging Face API token with proper permissions.
 """
 
+import asyncio
+import importlib.util
 import logging
 import os
-import json
+import threading
 import requests
-from typing import Dict, List, Any, Optional
-from app.config import MODEL_PATH
+from typing import Dict, List, Any, Optional, Tuple, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import (
+    MODEL_PATH,
+    INFERENCE_API_BATCH_ENABLED,
+    INFERENCE_API_MAX_BATCH,
+    INFERENCE_API_BATCH_WAIT_MS
+)
 from rag.rag_system import TaxLawRAG
 from core_ai_engine.prompt_engineering import create_tax_query_prompt, format_ai_response_with_citations
 from app.ai.mock_response import create_mock_query_response
 from app.ai.response_formatter import format_response
 
+# Optional async HTTP client for non-blocking Inference API calls
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# HTTP/2 multiplexes concurrent requests over one connection; httpx needs the h2 package for it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Global variables 
 _rag_system = None
+_rag_lock = threading.Lock()
+_async_client = None
+_auth_headers = None  # Built once from the token on first use
+
+# The model endpoint is fixed for the lifetime of the process
+_API_URL = f"https://api-inference.huggingface.co/models/{MODEL_PATH}"
+
+# Shared keep-alive session so sync API calls reuse TCP/TLS connections;
+# transient gateway errors are retried with a short backoff
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=None,
+        raise_on_status=False
+    )
+))
 
 def _get_huggingface_token():
     """
@@ -48,43 +87,52 @@ def get_rag_system():
     """
     global _rag_system
     if _rag_system is None:
-        logger.info("Initializing RAG system")
-        try:
-            _rag_system = TaxLawRAG()
-            logger.info(f"RAG system initialized with {_rag_system.get_document_count()} documents")
-        except Exception as e:
-            logger.error(f"Error initializing RAG system: {str(e)}")
-            raise RuntimeError(f"Failed to initialize RAG system: {str(e)}")
+        # Double-checked so concurrent first requests build the RAG system only once
+        with _rag_lock:
+            if _rag_system is None:
+                logger.info("Initializing RAG system")
+                try:
+                    _rag_system = TaxLawRAG()
+                    logger.info(f"RAG system initialized with {_rag_system.get_document_count()} documents")
+                except Exception as e:
+                    logger.error(f"Error initializing RAG system: {str(e)}")
+                    raise RuntimeError(f"Failed to initialize RAG system: {str(e)}")
     
     return _rag_system
 
-def generate_with_inference_api(prompt: str, fallback_to_mock: bool = True) -> str:
+def _get_auth_headers() -> Dict[str, str]:
     """
-    Generate text using the Hugging Face Inference API
+    Get the authenticated request headers, reading the token only on first use
+    """
+    global _auth_headers
+    if _auth_headers is None:
+        # Get Hugging Face token
+        hf_token = _get_huggingface_token()
+        if not hf_token:
+            raise ValueError(
+                "HUGGINGFACE_TOKEN not found. Please set this environment variable "
+                "or add it to your .env file."
+            )
+        
+        # Set up headers with authentication
+        _auth_headers = {
+            "Authorization": f"Bearer {hf_token}",
+            "Content-Type": "application/json"
+        }
+    
+    return _auth_headers
+
+def _build_inference_request(prompt: Union[str, List[str]]) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    """
+    Build the endpoint URL, headers and payload for an Inference API call
     
     Args:
-        prompt: The text prompt to send to the model
-        fallback_to_mock: Whether to use mock responses when the API is unavailable
+        prompt: The text prompt to send to the model, or a list of prompts for a batch
         
     Returns:
-        The generated text response
+        Tuple of (api_url, headers, payload)
     """
-    # Get Hugging Face token
-    hf_token = _get_huggingface_token()
-    if not hf_token:
-        raise ValueError(
-            "HUGGINGFACE_TOKEN not found. Please set this environment variable "
-            "or add it to your .env file."
-        )
-    
-    # Define the API endpoint
-    api_url = f"https://api-inference.huggingface.co/models/{MODEL_PATH}"
-    
-    # Set up headers with authentication
-    headers = {
-        "Authorization": f"Bearer {hf_token}",
-        "Content-Type": "application/json"
-    }
+    headers = _get_auth_headers()
     
     # Prepare the payload
     payload = {
@@ -98,62 +146,333 @@ def generate_with_inference_api(prompt: str, fallback_to_mock: bool = True) -> s
         }
     }
     
+    return _API_URL, headers, payload
+
+def _parse_inference_result(result: Any, prompt: str) -> str:
+    """
+    Extract the generated text from an Inference API response body
+    
+    Args:
+        result: The decoded JSON response
+        prompt: The prompt that was sent, stripped from the output if echoed
+        
+    Returns:
+        The generated text response
+    """
+    if isinstance(result, list) and len(result) > 0:
+        generated_text = result[0].get("generated_text", "")
+        
+        # If the response includes the prompt, remove it
+        if generated_text.startswith(prompt):
+            generated_text = generated_text[len(prompt):].strip()
+            
+        return generated_text
+    else:
+        logger.error(f"Unexpected API response format: {result}")
+        return "Error: Unexpected response from the Inference API"
+
+def _handle_http_error(status_code: int, error: Exception, fallback_to_mock: bool) -> Optional[str]:
+    """
+    Map an HTTP error status from the Inference API to a mock fallback or an exception
+    
+    Args:
+        status_code: The HTTP status code returned by the API
+        error: The original HTTP error
+        fallback_to_mock: Whether to use mock responses when the API is unavailable
+        
+    Returns:
+        None to signal that a mock response should be used
+    """
+    # Handle common API errors
+    error_msg = f"Inference API error: {str(error)}"
+    
+    if status_code == 401:
+        error_msg = "Authentication failed. Please check your Hugging Face API token."
+    elif status_code == 403:
+        error_msg = "Access denied. Your account may not have access to this model."
+    elif status_code == 429:
+        error_msg = "Too many requests. You may be rate-limited by the Hugging Face API."
+    elif status_code == 503:
+        error_msg = "Hugging Face Inference API is temporarily unavailable."
+        
+        # If we should fallback to mock responses
+        if fallback_to_mock:
+            logger.warning("Falling back to mock response due to API unavailability")
+            return None  # Signal to use mock response
+    
+    logger.error(error_msg)
+    
+    # Propagate the error if not falling back to mock
+    if not fallback_to_mock or status_code not in [503, 429]:
+        raise RuntimeError(error_msg)
+    return None
+
+def _handle_request_error(error: Exception, fallback_to_mock: bool) -> Optional[str]:
+    """
+    Handle a non-HTTP failure while calling the Inference API
+    
+    Args:
+        error: The exception raised by the request
+        fallback_to_mock: Whether to use mock responses when the API is unavailable
+        
+    Returns:
+        None to signal that a mock response should be used
+    """
+    logger.error(f"Error calling Inference API: {str(error)}")
+    
+    # If we should fallback to mock responses
+    if fallback_to_mock:
+        logger.warning("Falling back to mock response due to exception")
+        return None  # Signal to use mock response
+        
+    raise RuntimeError(f"Failed to call Inference API: {str(error)}")
+
+def generate_with_inference_api(prompt: str, fallback_to_mock: bool = True) -> str:
+    """
+    Generate text using the Hugging Face Inference API
+    
+    Args:
+        prompt: The text prompt to send to the model
+        fallback_to_mock: Whether to use mock responses when the API is unavailable
+        
+    Returns:
+        The generated text response
+    """
+    api_url, headers, payload = _build_inference_request(prompt)
+    
     # Make the API request
     try:
         logger.info(f"Sending request to Inference API: {api_url}")
-        response = requests.post(api_url, headers=headers, json=payload)
+        response = _SESSION.post(api_url, headers=headers, json=payload, timeout=60)
         response.raise_for_status()  # Raise exception for HTTP errors
         
         # Parse the response
-        result = response.json()
+        return _parse_inference_result(response.json(), prompt)
+    
+    except requests.exceptions.HTTPError as e:
+        return _handle_http_error(response.status_code, e, fallback_to_mock)
+    
+    except Exception as e:
+        return _handle_request_error(e, fallback_to_mock)
+
+def _get_async_client() -> "httpx.AsyncClient":
+    """
+    Get the shared async HTTP client, creating it on first use
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=60
+        )
+    return _async_client
+
+async def close_async_client() -> None:
+    """
+    Close the shared async HTTP client and its pooled connections
+    """
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+class _InferenceBatcher:
+    """
+    Coalesces prompts submitted within a short window into one list-input API request.
+    
+    A single worker task per event loop drains the queue, waiting up to wait_ms
+    after the first prompt for up to max_batch prompts, and scatters the
+    generated texts back to the awaiting callers in order.
+    """
+    
+    def __init__(self, max_batch: int, wait_ms: int):
+        self.max_batch = max_batch
+        self.wait = wait_ms / 1000.0
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self._pending = set()
+    
+    def _ensure_worker(self) -> None:
+        """Start the worker task on the running event loop if it is not already running."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+    
+    async def submit(self, prompt: str) -> str:
+        """
+        Queue a prompt and wait for its generated text
         
-        # Extract the generated text
-        if isinstance(result, list) and len(result) > 0:
-            generated_text = result[0].get("generated_text", "")
+        Args:
+            prompt: The text prompt to send to the model
             
-            # If the response includes the prompt, remove it
-            if generated_text.startswith(prompt):
-                generated_text = generated_text[len(prompt):].strip()
-                
-            return generated_text
-        else:
-            logger.error(f"Unexpected API response format: {result}")
-            return "Error: Unexpected response from the Inference API"
+        Returns:
+            The generated text response
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((prompt, future))
+        return await future
     
-    except requests.exceptions.HTTPError as e:
-        # Handle common API errors
-        error_msg = f"Inference API error: {str(e)}"
-        
-        if response.status_code == 401:
-            error_msg = "Authentication failed. Please check your Hugging Face API token."
-        elif response.status_code == 403:
-            error_msg = "Access denied. Your account may not have access to this model."
-        elif response.status_code == 429:
-            error_msg = "Too many requests. You may be rate-limited by the Hugging Face API."
-        elif response.status_code == 503:
-            error_msg = "Hugging Face Inference API is temporarily unavailable."
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Send without awaiting so the next batch can form while this one is in flight
+            dispatch = self._loop.create_task(self._dispatch(batch))
+            self._pending.add(dispatch)
+            dispatch.add_done_callback(self._pending.discard)
+    
+    async def _dispatch(self, batch: List[Tuple[str, "asyncio.Future"]]) -> None:
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            api_url, headers, payload = _build_inference_request(prompts)
+            logger.info(f"Sending batch of {len(prompts)} prompts to Inference API: {api_url}")
+            response = await _get_async_client().post(api_url, headers=headers, json=payload)
+            response.raise_for_status()  # Raise exception for HTTP errors
+            
+            results = response.json()
+            if not isinstance(results, list) or len(results) != len(prompts):
+                raise ValueError(f"Expected {len(prompts)} results from batched Inference API call")
             
-            # If we should fallback to mock responses
-            if fallback_to_mock:
-                logger.warning("Falling back to mock response due to API unavailability")
-                return None  # Signal to use mock response
+            for (prompt, future), result in zip(batch, results):
+                # Each input yields either one result dict or a list of them
+                if isinstance(result, dict):
+                    result = [result]
+                if not future.done():
+                    future.set_result(_parse_inference_result(result, prompt))
+        except Exception as e:
+            # Every caller in the batch handles the failure with its own fallback setting
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+_batcher = _InferenceBatcher(INFERENCE_API_MAX_BATCH, INFERENCE_API_BATCH_WAIT_MS)
+
+async def generate_with_inference_api_async(prompt: str, fallback_to_mock: bool = True) -> str:
+    """
+    Generate text using the Hugging Face Inference API without blocking the event loop
+    
+    Args:
+        prompt: The text prompt to send to the model
+        fallback_to_mock: Whether to use mock responses when the API is unavailable
         
-        logger.error(error_msg)
+    Returns:
+        The generated text response
+    """
+    if not HTTPX_AVAILABLE:
+        # Run the blocking client in a worker thread instead
+        return await asyncio.to_thread(generate_with_inference_api, prompt, fallback_to_mock)
+    
+    if INFERENCE_API_BATCH_ENABLED:
+        try:
+            return await _batcher.submit(prompt)
+        except httpx.HTTPStatusError as e:
+            return _handle_http_error(e.response.status_code, e, fallback_to_mock)
+        except Exception as e:
+            return _handle_request_error(e, fallback_to_mock)
+    
+    api_url, headers, payload = _build_inference_request(prompt)
+    
+    # Make the API request over the pooled keep-alive connections
+    try:
+        logger.info(f"Sending request to Inference API: {api_url}")
+        response = await _get_async_client().post(api_url, headers=headers, json=payload)
+        response.raise_for_status()  # Raise exception for HTTP errors
         
-        # Propagate the error if not falling back to mock
-        if not fallback_to_mock or response.status_code not in [503, 429]:
-            raise RuntimeError(error_msg)
-        return None
+        # Parse the response
+        return _parse_inference_result(response.json(), prompt)
+    
+    except httpx.HTTPStatusError as e:
+        return _handle_http_error(e.response.status_code, e, fallback_to_mock)
     
     except Exception as e:
-        logger.error(f"Error calling Inference API: {str(e)}")
+        return _handle_request_error(e, fallback_to_mock)
+
+def _retrieve_context_docs(query: str) -> List[Dict[str, Any]]:
+    """
+    Retrieve relevant tax law documents for a query, with a placeholder when none match
+    
+    Args:
+        query: The tax law query to process
         
-        # If we should fallback to mock responses
-        if fallback_to_mock:
-            logger.warning("Falling back to mock response due to exception")
-            return None  # Signal to use mock response
-            
-        raise RuntimeError(f"Failed to call Inference API: {str(e)}")
+    Returns:
+        List of context documents
+    """
+    # Get RAG system
+    rag = get_rag_system()
+    
+    # Step 1: Retrieve relevant tax law documents
+    logger.info(f"Retrieving context for query: {query}")
+    context_docs = rag.search(query, n_results=3)
+    
+    if not context_docs:
+        logger.warning(f"No relevant documents found for query: {query}")
+        # Fallback to handle the case with no context
+        context_docs = [{
+            "content": "No specific tax law reference found.",
+            "metadata": {"source": "System Note"}
+        }]
+    
+    return context_docs
+
+def _format_generated_response(query: str, prompt: str, response_text: Optional[str],
+                               context_docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Turn generated text into the formatted API response
+    
+    Args:
+        query: The tax law query being answered
+        prompt: The prompt that produced the response
+        response_text: The generated text, or None if the API was unavailable
+        context_docs: The context documents used in the prompt
+        
+    Returns:
+        Dict containing the response, citations, and confidence score
+    """
+    # If API call failed or returned None, use mock response
+    if response_text is None:
+        logger.info("API unavailable, using mock response")
+        return create_mock_query_response(query, context_docs)
+    
+    # Extract the answer part (after the prompt)
+    if "ANSWER:" in prompt and "ANSWER:" in response_text:
+        response_text = response_text.split("ANSWER:", 1)[1].strip()
+    
+    # Step 4: Format response with citations
+    formatted_response = format_ai_response_with_citations(response_text, context_docs)
+    
+    # Step 5: Use our enhanced response formatter for better citation handling
+    enhanced_response = format_response(response_text, context_docs)
+    
+    # Return the enhanced formatted response
+    return enhanced_response
+
+def _mock_response_on_error(query: str, error: Exception,
+                            context_docs: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Fall back to a mock response after a failure, re-raising if that fails too
+    """
+    logger.error(f"Error generating AI response: {str(error)}")
+    
+    # Try using mock response as a fallback for any errors
+    try:
+        logger.warning("Attempting to use mock response due to error")
+        return create_mock_query_response(query, context_docs if context_docs is not None else [])
+    except:
+        # If even the mock response fails, propagate the original error
+        raise RuntimeError(f"Failed to generate AI response: {str(error)}")
 
 def generate_ai_response(query: str, use_mock: bool = False) -> Dict[str, Any]:
     """
@@ -166,21 +485,9 @@ def generate_ai_response(query: str, use_mock: bool = False) -> Dict[str, Any]:
     Returns:
         Dict containing the response, citations, and confidence score
     """
+    context_docs = None
     try:
-        # Get RAG system
-        rag = get_rag_system()
-        
-        # Step 1: Retrieve relevant tax law documents
-        logger.info(f"Retrieving context for query: {query}")
-        context_docs = rag.search(query, n_results=3)
-        
-        if not context_docs:
-            logger.warning(f"No relevant documents found for query: {query}")
-            # Fallback to handle the case with no context
-            context_docs = [{
-                "content": "No specific tax law reference found.",
-                "metadata": {"source": "System Note"}
-            }]
+        context_docs = _retrieve_context_docs(query)
         
         # If we're using mock responses, skip the API call
         if use_mock:
@@ -195,34 +502,61 @@ def generate_ai_response(query: str, use_mock: bool = False) -> Dict[str, Any]:
         logger.info("Generating AI response via Inference API")
         response_text = generate_with_inference_api(prompt)
         
-        # If API call failed or returned None, use mock response
-        if response_text is None:
-            logger.info("API unavailable, using mock response")
-            return create_mock_query_response(query, context_docs)
+        return _format_generated_response(query, prompt, response_text, context_docs)
+    
+    except Exception as e:
+        return _mock_response_on_error(query, e, context_docs)
+
+async def generate_ai_response_async(query: str, use_mock: bool = False) -> Dict[str, Any]:
+    """
+    Generate an AI response to a tax law query without blocking the event loop.
+    
+    Retrieval runs in a worker thread and the Inference API call is awaited,
+    so concurrent requests overlap their network round trips.
+    
+    Args:
+        query: The tax law query to process
+        use_mock: Force using mock responses instead of the API
         
-        # Extract the answer part (after the prompt)
-        if "ANSWER:" in prompt and "ANSWER:" in response_text:
-            response_text = response_text.split("ANSWER:", 1)[1].strip()
+    Returns:
+        Dict containing the response, citations, and confidence score
+    """
+    context_docs = None
+    try:
+        context_docs = await asyncio.to_thread(_retrieve_context_docs, query)
         
-        # Step 4: Format response with citations
-        formatted_response = format_ai_response_with_citations(response_text, context_docs)
+        # If we're using mock responses, skip the API call
+        if use_mock:
+            logger.info("Using mock response as requested")
+            return create_mock_query_response(query, context_docs)
+        
+        # Step 2: Create prompt with retrieved context
+        logger.info("Creating prompt with context")
+        prompt = create_tax_query_prompt(query, context_docs)
         
-        # Step 5: Use our enhanced response formatter for better citation handling
-        enhanced_response = format_response(response_text, context_docs)
+        # Step 3: Generate response using the Inference API
+        logger.info("Generating AI response via Inference API")
+        response_text = await generate_with_inference_api_async(prompt)
         
-        # Return the enhanced formatted response
-        return enhanced_response
+        return _format_generated_response(query, prompt, response_text, context_docs)
     
     except Exception as e:
-        logger.error(f"Error generating AI response: {str(e)}")
+        return _mock_response_on_error(query, e, context_docs)
+
+async def generate_ai_responses_async(queries: List[str], use_mock: bool = False) -> List[Dict[str, Any]]:
+    """
+    Generate AI responses for several tax law queries concurrently.
+    
+    Args:
+        queries: The tax law queries to process
+        use_mock: Force using mock responses instead of the API
         
-        # Try using mock response as a fallback for any errors
-        try:
-            logger.warning("Attempting to use mock response due to error")
-            return create_mock_query_response(query, context_docs if 'context_docs' in locals() else [])
-        except:
-            # If even the mock response fails, propagate the original error
-            raise RuntimeError(f"Failed to generate AI response: {str(e)}")
+    Returns:
+        List of response dicts in the same order as the queries
+    """
+    return list(await asyncio.gather(
+        *(generate_ai_response_async(query, use_mock=use_mock) for query in queries)
+    ))
 
 def initialize():
     """
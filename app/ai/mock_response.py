@@ -11,9 +11,23 @@ from typing import Dict, List, Any
 from app.ai.response_formatter import format_response
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Collection of generic tax-related phrases to use in responses
+_INTRO_PHRASES = (
+    "Based on the tax regulations I found,",
+    "According to the relevant tax laws,",
+    "The tax code provides that",
+    "Tax regulations specify that",
+    "As outlined in the relevant tax guidance,"
+)
+
+# Private generator so mock responses don't share the global random state
+_rng = random.Random()
+
+# Line breaks and tabs become spaces in response snippets
+_WHITESPACE_TABLE = str.maketrans("\n\r\t", "   ")
+
 def generate_mock_response(query: str, context_docs: List[Dict[str, Any]]) -> str:
     """
     Generate a mock response for a tax law query based on retrieved context.
@@ -30,33 +44,19 @@ def generate_mock_response(query: str, context_docs: List[Dict[str, Any]]) -> st
     # Extract key terms from the query for context-aware responses
     query_lower = query.lower()
     
-    # Collection of generic tax-related phrases to use in responses
-    intro_phrases = [
-        "Based on the tax regulations I found,",
-        "According to the relevant tax laws,",
-        "The tax code provides that",
-        "Tax regulations specify that",
-        "As outlined in the relevant tax guidance,"
-    ]
-    
-    # Default response if no context matches
-    default_response = (
-        f"{random.choice(intro_phrases)} general tax principles apply. "
-        "For specific advice on your situation, please consult with a qualified tax professional."
-    )
-    
     # If we have context docs, use them to craft a more relevant response
     if context_docs:
         # Summarize content from the first relevant document
         doc_content = context_docs[0].get("content", "")
         doc_source = context_docs[0].get("metadata", {}).get("source", "tax regulations")
         
-        # Extract a relevant snippet from the content (first 200 chars)
-        snippet = doc_content.strip()[:200].replace("\n", " ")
+        # Extract a relevant snippet from the content (first 200 chars), slicing
+        # before cleaning so large documents are not scanned in full
+        snippet = doc_content[:256].translate(_WHITESPACE_TABLE).strip()[:200]
         
         # Construct a mock response that references the context
         response = (
-            f"{random.choice(intro_phrases)} {snippet} "
+            f"{_rng.choice(_INTRO_PHRASES)} {snippet} "
             f"According to {doc_source} [1], this is generally how the tax treatment works for this type of situation. "
             "However, individual circumstances may vary, and it's advisable to consult with a tax professional "
             "for personalized guidance."
@@ -64,7 +64,11 @@ def generate_mock_response(query: str, context_docs: List[Dict[str, Any]]) -> st
         
         return response
     
-    return default_response
+    # Default response if no context matches
+    return (
+        f"{_rng.choice(_INTRO_PHRASES)} general tax principles apply. "
+        "For specific advice on your situation, please consult with a qualified tax professional."
+    )
 
 def create_mock_query_response(query: str, context_docs: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
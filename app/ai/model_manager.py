@@ -5,23 +5,50 @@ This module handles loading and caching the AI model (Mistral-7B)
 and provides function for processing tax law queries.
 """
 
+import asyncio
+import importlib.util
 import logging
 import os
-from typing import Dict, List, Any, Optional
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import threading
+from typing import Dict, List, Any, AsyncIterator, Optional, Tuple
+from transformers import (
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer
+)
 import torch
-from app.config import MODEL_PATH
+from app.config import (
+    MODEL_PATH,
+    QUANTIZED_MODEL_PATH,
+    MODEL_BATCH_SIZE,
+    MODEL_BATCH_WAIT_MS,
+    USE_TORCH_COMPILE
+)
 from rag.rag_system import TaxLawRAG
-from core_ai_engine.prompt_engineering import create_tax_query_prompt, format_ai_response_with_citations
+from core_ai_engine.prompt_engineering import (
+    TAX_QUERY_PROMPT_PREFIX,
+    create_tax_query_prompt,
+    format_ai_response_with_citations
+)
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Global variables to store model and tokenizer
 _model = None
+_model_compiled = False
 _tokenizer = None
+_prefix_ids = None
+_prefix_len = 0
 _rag_system = None
+_model_lock = threading.Lock()
+_tokenizer_lock = threading.Lock()
+_rag_lock = threading.Lock()
+# With a static KV cache, generate reuses one cache object stored on the model,
+# so concurrent generate calls must take turns
+_generate_lock = threading.Lock()
 
 def _get_huggingface_token():
     """
@@ -39,49 +66,117 @@ def _get_huggingface_token():
     
     return hf_token
 
+def _load_quantized_model(hf_token: Optional[str], attn_implementation: str):
+    """
+    Load the pre-quantized AWQ/GPTQ checkpoint, returning None if it cannot be loaded.
+    
+    Weight-only quantized checkpoints keep their weights packed on the GPU and
+    dequantize them inside fused matmul kernels, so they cut memory traffic as
+    well as memory use. bitsandbytes LLM.int8 (load_in_8bit) only saves memory:
+    its outlier handling makes inference slower than fp16.
+    
+    Args:
+        hf_token: Hugging Face API token
+        attn_implementation: Attention implementation to load the model with
+        
+    Returns:
+        The loaded model, or None to fall back to the full-precision checkpoint
+    """
+    try:
+        logger.info(f"Loading pre-quantized model: {QUANTIZED_MODEL_PATH}")
+        return AutoModelForCausalLM.from_pretrained(
+            QUANTIZED_MODEL_PATH,
+            device_map="auto",
+            torch_dtype=torch.float16,  # AWQ/GPTQ kernels compute in fp16
+            attn_implementation=attn_implementation,
+            low_cpu_mem_usage=True,
+            token=hf_token
+        )
+    except Exception as e:
+        logger.warning(f"Could not load pre-quantized model, falling back to {MODEL_PATH}: {str(e)}")
+        return None
+
 def get_model():
     """
     Loads and returns the model, with caching to avoid reloading.
     """
-    global _model
+    global _model, _model_compiled
     if _model is None:
-        logger.info(f"Loading model: {MODEL_PATH}")
-        try:
-            # Get Hugging Face token
-            hf_token = _get_huggingface_token()
-            
-            # For GPU
-            if torch.cuda.is_available():
-                logger.info("Using GPU for model inference")
-                device = torch.device("cuda")
-                _model = AutoModelForCausalLM.from_pretrained(
-                    MODEL_PATH, 
-                    torch_dtype=torch.float16,
-                    low_cpu_mem_usage=True,
-                    token=hf_token
-                ).to(device)
-            else:
-                # For CPU (with quantization to reduce memory usage)
-                logger.info("Using CPU for model inference (with quantization)")
-                _model = AutoModelForCausalLM.from_pretrained(
-                    MODEL_PATH,
-                    device_map="auto",
-                    load_in_8bit=True,  # Use quantization to reduce memory needs
-                    token=hf_token
-                )
-                
-            logger.info("Model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading model: {str(e)}")
-            
-            # Provide a specific message for authentication errors
-            if "401" in str(e) and "Unauthorized" in str(e):
-                raise RuntimeError(
-                    "Authentication failed when loading the model. "
-                    "Please set your HUGGINGFACE_TOKEN environment variable. "
-                    "You can get a token from https://huggingface.co/settings/tokens"
-                )
-            raise RuntimeError(f"Failed to load AI model: {str(e)}")
+        # Double-checked so concurrent first requests load the model only once
+        with _model_lock:
+            if _model is None:
+                logger.info(f"Loading model: {MODEL_PATH}")
+                try:
+                    # Get Hugging Face token
+                    hf_token = _get_huggingface_token()
+                    
+                    # For GPU
+                    if torch.cuda.is_available():
+                        logger.info("Using GPU for model inference")
+                        device = torch.device("cuda")
+                        # Let fp32 matmuls use TF32 tensor cores on Ampere+ and let cuDNN
+                        # pick the fastest kernels for the (padded, mostly static) shapes
+                        torch.backends.cuda.matmul.allow_tf32 = True
+                        torch.backends.cudnn.benchmark = True
+                        # Ampere (compute capability 8.x) and newer run bf16 at fp16 speed with a
+                        # wider range, and support FlashAttention-2 when it is installed
+                        ampere_or_newer = torch.cuda.get_device_capability()[0] >= 8
+                        if ampere_or_newer and importlib.util.find_spec("flash_attn") is not None:
+                            attn_implementation = "flash_attention_2"
+                        else:
+                            attn_implementation = "sdpa"
+                        # Prefer a pre-quantized checkpoint when one is configured
+                        if QUANTIZED_MODEL_PATH:
+                            _model = _load_quantized_model(hf_token, attn_implementation)
+                        if _model is None:
+                            _model = AutoModelForCausalLM.from_pretrained(
+                                MODEL_PATH, 
+                                torch_dtype=torch.bfloat16 if ampere_or_newer else torch.float16,
+                                attn_implementation=attn_implementation,
+                                low_cpu_mem_usage=True,
+                                token=hf_token
+                            ).to(device)
+                        
+                        # When opted in, compile the forward pass into CUDA graphs so each decoded
+                        # token avoids Python dispatch and kernel-launch overhead; a static KV cache
+                        # keeps decode-step shapes fixed so the captured graphs can be replayed
+                        if USE_TORCH_COMPILE and hasattr(torch, "compile"):
+                            try:
+                                torch.set_float32_matmul_precision("high")
+                                _model.generation_config.cache_implementation = "static"
+                                _model.forward = torch.compile(
+                                    _model.forward,
+                                    mode="reduce-overhead",
+                                    fullgraph=False
+                                )
+                                _model_compiled = True
+                                logger.info("Model forward pass compiled with torch.compile")
+                            except Exception as e:
+                                logger.warning(f"torch.compile unavailable, using eager mode: {str(e)}")
+                    else:
+                        # For CPU: bf16 halves memory versus fp32 without bitsandbytes 8-bit
+                        # quantization, which needs CUDA kernels and dequantizes on every forward pass
+                        logger.info("Using CPU for model inference (bf16)")
+                        _model = AutoModelForCausalLM.from_pretrained(
+                            MODEL_PATH,
+                            torch_dtype=torch.bfloat16,
+                            attn_implementation="sdpa",
+                            low_cpu_mem_usage=True,
+                            token=hf_token
+                        )
+                        
+                    logger.info("Model loaded successfully")
+                except Exception as e:
+                    logger.error(f"Error loading model: {str(e)}")
+                    
+                    # Provide a specific message for authentication errors
+                    if "401" in str(e) and "Unauthorized" in str(e):
+                        raise RuntimeError(
+                            "Authentication failed when loading the model. "
+                            "Please set your HUGGINGFACE_TOKEN environment variable. "
+                            "You can get a token from https://huggingface.co/settings/tokens"
+                        )
+                    raise RuntimeError(f"Failed to load AI model: {str(e)}")
     
     return _model
 
@@ -89,26 +184,56 @@ def get_tokenizer():
     """
     Loads and returns the tokenizer, with caching to avoid reloading.
     """
-    global _tokenizer
+    global _tokenizer, _prefix_ids, _prefix_len
     if _tokenizer is None:
-        logger.info(f"Loading tokenizer: {MODEL_PATH}")
-        try:
-            # Get Hugging Face token
-            hf_token = _get_huggingface_token()
-            
-            _tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH, token=hf_token)
-            logger.info("Tokenizer loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading tokenizer: {str(e)}")
-            
-            # Provide a specific message for authentication errors
-            if "401" in str(e) and "Unauthorized" in str(e):
-                raise RuntimeError(
-                    "Authentication failed when loading the tokenizer. "
-                    "Please set your HUGGINGFACE_TOKEN environment variable. "
-                    "You can get a token from https://huggingface.co/settings/tokens"
-                )
-            raise RuntimeError(f"Failed to load tokenizer: {str(e)}")
+        # Double-checked so concurrent first requests load the tokenizer only once
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                logger.info(f"Loading tokenizer: {MODEL_PATH}")
+                try:
+                    # Get Hugging Face token
+                    hf_token = _get_huggingface_token()
+                    
+                    # The Rust-backed fast tokenizer also encodes batches in parallel.
+                    # Batched causal generation needs padding on the left so every
+                    # prompt ends right where its generated tokens begin
+                    tokenizer = AutoTokenizer.from_pretrained(
+                        MODEL_PATH, use_fast=True, padding_side="left", token=hf_token
+                    )
+                    if not getattr(tokenizer, "is_fast", False):
+                        # Without a tokenizer.json transformers silently falls back to the
+                        # Python tokenizer; build the fast one from the slow files instead
+                        logger.warning("No fast tokenizer files found, converting the slow tokenizer")
+                        try:
+                            tokenizer = AutoTokenizer.from_pretrained(
+                                MODEL_PATH, use_fast=True, from_slow=True, padding_side="left", token=hf_token
+                            )
+                        except Exception as e:
+                            logger.warning(f"Fast tokenizer conversion failed, using the slow tokenizer: {str(e)}")
+                    if tokenizer.pad_token is None:
+                        tokenizer.pad_token = tokenizer.eos_token
+                    
+                    # Tokenize the fixed instruction prefix shared by every prompt once,
+                    # so each request only tokenizes its own context and question
+                    prefix_ids = tokenizer(TAX_QUERY_PROMPT_PREFIX, add_special_tokens=True)["input_ids"]
+                    _prefix_len = len(prefix_ids)
+                    if _prefix_concat_matches(tokenizer, prefix_ids):
+                        _prefix_ids = prefix_ids
+                    else:
+                        logger.info("Tokenizer splits the prompt prefix differently in context, tokenizing full prompts")
+                    _tokenizer = tokenizer
+                    logger.info("Tokenizer loaded successfully")
+                except Exception as e:
+                    logger.error(f"Error loading tokenizer: {str(e)}")
+                    
+                    # Provide a specific message for authentication errors
+                    if "401" in str(e) and "Unauthorized" in str(e):
+                        raise RuntimeError(
+                            "Authentication failed when loading the tokenizer. "
+                            "Please set your HUGGINGFACE_TOKEN environment variable. "
+                            "You can get a token from https://huggingface.co/settings/tokens"
+                        )
+                    raise RuntimeError(f"Failed to load tokenizer: {str(e)}")
     
     return _tokenizer
 
@@ -118,100 +243,465 @@ def get_rag_system():
     """
     global _rag_system
     if _rag_system is None:
-        logger.info("Initializing RAG system")
+        # Double-checked so concurrent first requests build the RAG system only once
+        with _rag_lock:
+            if _rag_system is None:
+                logger.info("Initializing RAG system")
+                try:
+                    _rag_system = TaxLawRAG()
+                    logger.info(f"RAG system initialized with {_rag_system.get_document_count()} documents")
+                except Exception as e:
+                    logger.error(f"Error initializing RAG system: {str(e)}")
+                    raise RuntimeError(f"Failed to initialize RAG system: {str(e)}")
+    
+    return _rag_system
+
+def _prefix_concat_matches(tokenizer, prefix_ids: List[int]) -> bool:
+    """
+    Check that the cached prefix ids plus the separately tokenized rest of a
+    prompt equal the ids of the whole prompt.
+    
+    SentencePiece tokenizers add a word-start marker to the beginning of the
+    text they encode, so for them the two differ. Prompts continue the prefix
+    with their first reference, so one sample prompt settles it for all of them.
+    
+    Args:
+        tokenizer: The loaded tokenizer
+        prefix_ids: Token ids of TAX_QUERY_PROMPT_PREFIX
+        
+    Returns:
+        True if the cached prefix ids can be reused
+    """
+    prompt = create_tax_query_prompt(
+        "What is the standard deduction?",
+        [{"source": "IRS Publication 17", "content": "The standard deduction depends on filing status."}]
+    )
+    suffix_ids = tokenizer(prompt[len(TAX_QUERY_PROMPT_PREFIX):], add_special_tokens=False)["input_ids"]
+    return prefix_ids + suffix_ids == tokenizer(prompt)["input_ids"]
+
+def _truncate_middle(ids: List[int], head: int, max_length: int) -> List[int]:
+    """
+    Shorten token ids to max_length by dropping tokens after the first head tokens.
+    
+    Args:
+        ids: Token ids of one prompt
+        head: Number of leading tokens to keep
+        max_length: Maximum number of tokens
+        
+    Returns:
+        The first head tokens followed by as many trailing tokens as still fit
+    """
+    if len(ids) <= max_length:
+        return ids
+    head = min(head, max_length // 2)
+    return ids[:head] + ids[len(ids) - (max_length - head):]
+
+def _tokenize_prompts(tokenizer, prompts: List[str], max_length: Optional[int], pad_to_multiple_of: Optional[int]) -> Dict[str, Any]:
+    """
+    Tokenize and left-pad a batch of prompts, reusing the cached prefix token
+    ids when the tokenizer allows it.
+    
+    Args:
+        tokenizer: The loaded tokenizer
+        prompts: The prompts to tokenize
+        max_length: Maximum prompt length in tokens, or None for no limit
+        pad_to_multiple_of: Pad the batch width to a multiple of this, or None
+        
+    Returns:
+        Dict with input_ids and attention_mask tensors
+    """
+    prefix_len = len(TAX_QUERY_PROMPT_PREFIX)
+    suffixes = [prompt[prefix_len:] for prompt in prompts if prompt.startswith(TAX_QUERY_PROMPT_PREFIX)]
+    if _prefix_ids is not None and len(suffixes) == len(prompts):
+        suffix_ids = tokenizer(suffixes, add_special_tokens=False)["input_ids"]
+        input_ids = [_prefix_ids + ids for ids in suffix_ids]
+    else:
+        input_ids = tokenizer(prompts)["input_ids"]
+    
+    # Over-long prompts lose the end of their references; BOS and the
+    # instructions at the head and the question at the tail are kept
+    if max_length:
+        truncated = []
+        for prompt, ids in zip(prompts, input_ids):
+            if prompt.startswith(TAX_QUERY_PROMPT_PREFIX):
+                head = _prefix_len
+            else:
+                head = 1 if ids and ids[0] == tokenizer.bos_token_id else 0
+            truncated.append(_truncate_middle(ids, head, max_length))
+        input_ids = truncated
+    
+    return tokenizer.pad(
+        {"input_ids": input_ids},
+        padding=True,
+        pad_to_multiple_of=pad_to_multiple_of,
+        return_tensors="pt"
+    )
+
+def _prepare_inputs(model, tokenizer, prompts: List[str], max_new_tokens: int) -> Dict[str, Any]:
+    """
+    Tokenize prompts for generation and move them to the model's device.
+    
+    Args:
+        model: The loaded model
+        tokenizer: The loaded tokenizer
+        prompts: The prompts to complete
+        max_new_tokens: Maximum number of tokens to generate per prompt
+        
+    Returns:
+        Dict with input_ids and attention_mask tensors
+    """
+    # Truncate prompts so the answer always has max_new_tokens of room in the
+    # context window, and pad to a multiple of 64 tokens so compiled graphs are
+    # reused across prompt lengths
+    max_positions = getattr(model.config, "max_position_embeddings", None)
+    inputs = _tokenize_prompts(
+        tokenizer,
+        prompts,
+        max_length=max_positions - max_new_tokens if max_positions else None,
+        pad_to_multiple_of=64 if _model_compiled else None
+    )
+    
+    # Move inputs to GPU if available
+    if torch.cuda.is_available():
+        inputs = {k: v.to('cuda') for k, v in inputs.items()}
+    
+    return inputs
+
+def _generate(model, inputs: Dict[str, Any], kwargs: Dict[str, Any]):
+    """
+    Run model.generate, serialized while the model uses a shared static KV cache.
+    
+    Args:
+        model: The loaded model
+        inputs: Tokenized prompts from _prepare_inputs
+        kwargs: Generation settings
+        
+    Returns:
+        The generated token ids
+    """
+    if not _model_compiled:
+        return model.generate(**inputs, **kwargs)
+    with _generate_lock:
+        return model.generate(**inputs, **kwargs)
+
+def _generation_kwargs(tokenizer, max_new_tokens: int) -> Dict[str, Any]:
+    """
+    Build the sampling settings shared by batched and streaming generation.
+    """
+    return {
+        "max_new_tokens": max_new_tokens,
+        "use_cache": True,
+        "temperature": 0.3,  # Lower temperature for fact-based responses
+        "do_sample": True,
+        "top_p": 0.9,
+        "repetition_penalty": 1.2,
+        "pad_token_id": tokenizer.pad_token_id,
+        "eos_token_id": tokenizer.eos_token_id
+    }
+
+def _generate_texts(prompts: List[str], max_new_tokens: int) -> List[str]:
+    """
+    Generate completions for a batch of prompts in a single model.generate call.
+    
+    Args:
+        prompts: The prompts to complete
+        max_new_tokens: Maximum number of tokens to generate per prompt
+        
+    Returns:
+        The generated text for each prompt, without the prompt itself
+    """
+    model = get_model()
+    tokenizer = get_tokenizer()
+    inputs = _prepare_inputs(model, tokenizer, prompts, max_new_tokens)
+    
+    # Generate output; inference mode also skips autograd's version counters
+    # and view tracking, which no_grad still maintains
+    with torch.inference_mode():
+        outputs = _generate(model, inputs, _generation_kwargs(tokenizer, max_new_tokens))
+    
+    # With left padding all prompts end at the same position, so the
+    # generated tokens are everything after the input width
+    return tokenizer.batch_decode(outputs[:, inputs["input_ids"].shape[1]:], skip_special_tokens=True)
+
+
+class _BatchScheduler:
+    """
+    Coalesces concurrent generation requests into batched model.generate calls.
+    
+    A single worker task per event loop collects prompts for up to wait_ms
+    after the first arrives (or until max_batch are queued) and runs one
+    generate call per distinct max_new_tokens in a worker thread, so the
+    event loop keeps serving requests while the GPU is busy.
+    """
+    
+    def __init__(self, max_batch: int, wait_ms: int):
+        self.max_batch = max_batch
+        self.wait = wait_ms / 1000.0
+        self._loop = None
+        self._queue = None
+        self._task = None
+    
+    def _ensure_worker(self) -> None:
+        """Start the worker task on the running event loop if it is not already running."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+    
+    async def submit(self, prompt: str, max_new_tokens: int) -> str:
+        """
+        Queue a prompt and wait for its generated text.
+        
+        Args:
+            prompt: The prompt to complete
+            max_new_tokens: Maximum number of tokens to generate
+            
+        Returns:
+            The generated text, without the prompt
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((prompt, max_new_tokens, future))
+        return await future
+    
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Requests with different generation limits cannot share a generate call
+            by_limit = {}
+            for item in batch:
+                by_limit.setdefault(item[1], []).append(item)
+            
+            for max_new_tokens, items in by_limit.items():
+                try:
+                    texts = await asyncio.to_thread(
+                        _generate_texts, [prompt for prompt, _, _ in items], max_new_tokens
+                    )
+                except Exception as e:
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future), text in zip(items, texts):
+                    if not future.done():
+                        future.set_result(text)
+
+_scheduler = _BatchScheduler(MODEL_BATCH_SIZE, MODEL_BATCH_WAIT_MS)
+
+
+class _StopOnEvent(StoppingCriteria):
+    """Stops generation once the event is set."""
+    
+    def __init__(self, event: threading.Event):
+        self.event = event
+    
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.event.is_set()
+
+
+class _StreamingGeneration:
+    """
+    Runs model.generate in a background thread, exposing text as it is decoded.
+    
+    Iterating over the streamer blocks until the next chunk of text is ready;
+    calling stop() ends generation at the next token so an abandoned stream
+    frees the GPU.
+    """
+    
+    def __init__(self, prompt: str, max_new_tokens: int):
+        model = get_model()
+        tokenizer = get_tokenizer()
+        inputs = _prepare_inputs(model, tokenizer, [prompt], max_new_tokens)
+        
+        self.streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.error = None
+        self._stop_event = threading.Event()
+        
+        kwargs = _generation_kwargs(tokenizer, max_new_tokens)
+        kwargs.update(
+            streamer=self.streamer,
+            stopping_criteria=StoppingCriteriaList([_StopOnEvent(self._stop_event)])
+        )
+        threading.Thread(target=self._run, args=(model, inputs, kwargs), daemon=True).start()
+    
+    def _run(self, model, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> None:
         try:
-            _rag_system = TaxLawRAG()
-            logger.info(f"RAG system initialized with {_rag_system.get_document_count()} documents")
+            # Inference mode is thread-local, so enter it in the generation thread
+            with torch.inference_mode():
+                _generate(model, inputs, kwargs)
         except Exception as e:
-            logger.error(f"Error initializing RAG system: {str(e)}")
-            raise RuntimeError(f"Failed to initialize RAG system: {str(e)}")
+            logger.error(f"Error in streaming generation: {str(e)}")
+            self.error = e
+            # Unblock the consumer; generate only ends the stream when it finishes
+            self.streamer.end()
     
-    return _rag_system
+    def stop(self) -> None:
+        """Stop generation at the next token."""
+        self._stop_event.set()
+
+def _prepare_prompt(query: str) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Retrieve context documents for a query and build its prompt.
+    
+    Args:
+        query: The tax law query to process
+        
+    Returns:
+        Tuple of (context_docs, prompt)
+    """
+    rag = get_rag_system()
+    
+    # Step 1: Retrieve relevant tax law documents
+    logger.info(f"Retrieving context for query: {query}")
+    context_docs = rag.search(query, n_results=3)
+    
+    if not context_docs:
+        logger.warning(f"No relevant documents found for query: {query}")
+        # Fallback to handle the case with no context
+        context_docs = [{
+            "content": "No specific tax law reference found.",
+            "metadata": {"source": "System Note"}
+        }]
+    
+    # Step 2: Create prompt with retrieved context
+    logger.info("Creating prompt with context")
+    prompt = create_tax_query_prompt(query, context_docs)
+    
+    return context_docs, prompt
 
-def generate_ai_response(query: str, max_length: int = 512) -> Dict[str, Any]:
+def _build_response(response_text: str, context_docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Format generated text and its context documents into the API response.
+    
+    Args:
+        response_text: The generated answer, without the prompt
+        context_docs: The context documents used in the prompt
+        
+    Returns:
+        Dict containing the response, citations, and confidence score
+    """
+    response_text = response_text.strip()
+    
+    # Step 4: Format response with citations
+    formatted_response = format_ai_response_with_citations(response_text, context_docs)
+    
+    # Step 5: Create response structure with citations in the required format
+    citations = []
+    for source in formatted_response.get("sources", []):
+        source_doc = context_docs[source["id"]-1] if source["id"] <= len(context_docs) else None
+        
+        if source_doc:
+            citations.append({
+                "source": source_doc.get("metadata", {}).get("source", source["citation"]),
+                "url": source_doc.get("metadata", {}).get("url", None),
+                "text": source_doc.get("content", "")[:200] + "..."  # Limit citation text length
+            })
+    
+    # Return the formatted response
+    return {
+        "response": formatted_response.get("answer", response_text),
+        "citations": citations,
+        "confidence_score": 0.85  # Default confidence score (could be calculated more dynamically)
+    }
+
+def generate_ai_response(query: str, max_new_tokens: int = 512) -> Dict[str, Any]:
     """
     Generate an AI response to a tax law query using the loaded model and RAG system.
     
     Args:
         query: The tax law query to process
-        max_length: Maximum token length for response generation
+        max_new_tokens: Maximum number of tokens to generate for the response
     
     Returns:
         Dict containing the response, citations, and confidence score
     """
     try:
-        # Get model and tokenizer
-        model = get_model()
-        tokenizer = get_tokenizer()
-        rag = get_rag_system()
-        
-        # Step 1: Retrieve relevant tax law documents
-        logger.info(f"Retrieving context for query: {query}")
-        context_docs = rag.search(query, n_results=3)
+        context_docs, prompt = _prepare_prompt(query)
         
-        if not context_docs:
-            logger.warning(f"No relevant documents found for query: {query}")
-            # Fallback to handle the case with no context
-            context_docs = [{
-                "content": "No specific tax law reference found.",
-                "metadata": {"source": "System Note"}
-            }]
+        # Step 3: Generate response using the model
+        logger.info("Generating AI response")
+        response_text = _generate_texts([prompt], max_new_tokens)[0]
         
-        # Step 2: Create prompt with retrieved context
-        logger.info("Creating prompt with context")
-        prompt = create_tax_query_prompt(query, context_docs)
+        return _build_response(response_text, context_docs)
+    
+    except Exception as e:
+        logger.error(f"Error generating AI response: {str(e)}")
+        raise RuntimeError(f"Failed to generate AI response: {str(e)}")
+
+async def generate_ai_response_async(query: str, max_new_tokens: int = 512) -> Dict[str, Any]:
+    """
+    Generate an AI response, sharing a batched generate call with concurrent requests.
+    
+    Args:
+        query: The tax law query to process
+        max_new_tokens: Maximum number of tokens to generate for the response
+    
+    Returns:
+        Dict containing the response, citations, and confidence score
+    """
+    try:
+        context_docs, prompt = await asyncio.to_thread(_prepare_prompt, query)
         
-        # Step 3: Generate response using the model
+        # Step 3: Generate response using the model, batched with other requests
         logger.info("Generating AI response")
-        inputs = tokenizer(prompt, return_tensors="pt", truncation=True)
-        
-        # Move inputs to GPU if available
-        if torch.cuda.is_available():
-            inputs = {k: v.to('cuda') for k, v in inputs.items()}
-        
-        # Generate output
-        with torch.no_grad():
-            outputs = model.generate(
-                **inputs, 
-                max_length=max_length,
-                temperature=0.3,  # Lower temperature for fact-based responses
-                do_sample=True,
-                top_p=0.9,
-                repetition_penalty=1.2
-            )
-        
-        # Decode and format the output
-        response_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
-        
-        # Extract the answer part (after the prompt)
-        if "ANSWER:" in prompt and "ANSWER:" in response_text:
-            response_text = response_text.split("ANSWER:", 1)[1].strip()
-        
-        # Step 4: Format response with citations
-        formatted_response = format_ai_response_with_citations(response_text, context_docs)
-        
-        # Step 5: Create response structure with citations in the required format
-        citations = []
-        for source in formatted_response.get("sources", []):
-            source_doc = context_docs[source["id"]-1] if source["id"] <= len(context_docs) else None
-            
-            if source_doc:
-                citations.append({
-                    "source": source_doc.get("metadata", {}).get("source", source["citation"]),
-                    "url": source_doc.get("metadata", {}).get("url", None),
-                    "text": source_doc.get("content", "")[:200] + "..."  # Limit citation text length
-                })
-        
-        # Return the formatted response
-        return {
-            "response": formatted_response.get("answer", response_text),
-            "citations": citations,
-            "confidence_score": 0.85  # Default confidence score (could be calculated more dynamically)
-        }
+        response_text = await _scheduler.submit(prompt, max_new_tokens)
+        
+        return _build_response(response_text, context_docs)
+    
+    except Exception as e:
+        logger.error(f"Error generating AI response: {str(e)}")
+        raise RuntimeError(f"Failed to generate AI response: {str(e)}")
+
+async def stream_ai_response_async(query: str, max_new_tokens: int = 512) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Generate an AI response, yielding text as soon as the model produces it.
+    
+    Args:
+        query: The tax law query to process
+        max_new_tokens: Maximum number of tokens to generate for the response
     
+    Yields:
+        ("token", text) for each decoded chunk of the answer, then ("done", response)
+        with the response, citations, and confidence score. Closing the generator
+        early stops generation.
+    """
+    try:
+        context_docs, prompt = await asyncio.to_thread(_prepare_prompt, query)
+        
+        logger.info("Streaming AI response")
+        generation = await asyncio.to_thread(_StreamingGeneration, prompt, max_new_tokens)
     except Exception as e:
         logger.error(f"Error generating AI response: {str(e)}")
         raise RuntimeError(f"Failed to generate AI response: {str(e)}")
+    
+    chunks = []
+    try:
+        # The streamer blocks between tokens, so wait for each one in a worker thread
+        while True:
+            text = await asyncio.to_thread(next, generation.streamer, None)
+            if text is None:
+                break
+            if text:
+                chunks.append(text)
+                yield "token", text
+    finally:
+        generation.stop()
+    
+    if generation.error is not None:
+        raise RuntimeError(f"Failed to generate AI response: {str(generation.error)}")
+    
+    yield "done", _build_response("".join(chunks), context_docs)
 
 def initialize():
     """
@@ -223,6 +713,13 @@ def initialize():
         get_model()
         get_tokenizer()
         get_rag_system()
+        
+        # Trigger graph capture now rather than on the first real request;
+        # the first call compiles and the second records the CUDA graphs
+        if _model_compiled:
+            logger.info("Warming up compiled model")
+            for _ in range(2):
+                _generate_texts(["What is the standard deduction?"], 8)
         return True
     except Exception as e:
         logger.error(f"Error initializing AI components: {str(e)}")
@@ -10,7 +10,6 @@ import logging
 from typing import Dict, List, Any, Optional
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def format_response(ai_answer: str, references: List[Dict[str, Any]]) -> Dict[str, Any]:
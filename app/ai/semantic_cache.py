@@ -0,0 +1,78 @@
+"""
+Semantic Response Cache for Tax Law Application
+
+This module short-circuits the whole RAG + generation pipeline for queries
+that are paraphrases of a question answered recently. Query embeddings are
+matched by cosine similarity using the SemanticCache from ai_engine.caching.
+"""
+
+import logging
+from typing import Dict, Any, Optional, Tuple
+from ai_engine.caching import SemanticCache
+from app.config import SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAXSIZE
+from app.ai.inference_api_manager import get_rag_system
+
+# The full model backend builds its own RAG system; embed with that one when it
+# is answering rather than loading a second embedding model and Chroma client
+try:
+    from app.ai.model_manager import get_rag_system as get_full_model_rag_system
+except ImportError:
+    get_full_model_rag_system = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Formatted API responses keyed by query embedding; the backend name is used as
+# the context so answers from different generators are never mixed
+response_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    maxsize=SEMANTIC_CACHE_MAXSIZE,
+    enabled=SEMANTIC_CACHE_ENABLED
+)
+
+def _embed_query(query: str, backend: str):
+    """
+    Embed a query with the sentence transformer of the backend's RAG system
+    """
+    if backend == "full_model" and get_full_model_rag_system is not None:
+        rag = get_full_model_rag_system()
+    else:
+        rag = get_rag_system()
+    return rag.embedding_model.encode(query, normalize_embeddings=True)
+
+def lookup_response(query: str, backend: str) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+    """
+    Look up a cached response for a semantically equivalent query.
+    
+    Args:
+        query: The tax law query
+        backend: Name of the generator that would answer the query
+    
+    Returns:
+        Tuple of (query embedding, cached response or None). The embedding is
+        None if the cache is disabled or the query could not be embedded.
+    """
+    if not response_cache.enabled:
+        return None, None
+    
+    try:
+        embedding = _embed_query(query, backend)
+    except Exception as e:
+        logger.warning(f"Semantic cache lookup failed: {str(e)}")
+        return None, None
+    
+    return embedding, response_cache.get(embedding, backend)
+
+def store_response(embedding: Optional[Any], backend: str, response: Dict[str, Any]) -> None:
+    """
+    Cache a generated response under its query embedding.
+    
+    Args:
+        embedding: Query embedding returned by lookup_response, or None to skip caching
+        backend: Name of the generator that produced the response
+        response: The formatted API response
+    """
+    # Mock responses stand in for an unavailable API and must not be reused
+    if embedding is None or response.get("is_mock", False):
+        return
+    response_cache.set(embedding, response, backend)
@@ -1,19 +1,35 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
+import asyncio
+import json
 import logging
 from app.models.api_models import QueryRequest, QueryResponse, Citation
 
+try:
+    from sse_starlette.sse import EventSourceResponse
+    SSE_STARLETTE_AVAILABLE = True
+except ImportError:
+    SSE_STARLETTE_AVAILABLE = False
+
 # Try to import from model_manager (for full model)
 try:
-    from app.ai.model_manager import generate_ai_response as generate_with_full_model
+    from app.ai.model_manager import (
+        generate_ai_response_async as generate_with_full_model_async,
+        stream_ai_response_async as stream_with_full_model_async
+    )
 except ImportError:
-    generate_with_full_model = None
+    generate_with_full_model_async = None
+    stream_with_full_model_async = None
 
 # Import the inference API version
-from app.ai.inference_api_manager import generate_ai_response as generate_with_inference_api
+from app.ai.inference_api_manager import (
+    generate_ai_response as generate_with_inference_api,
+    generate_ai_response_async as generate_with_inference_api_async
+)
+from app.ai.semantic_cache import lookup_response, store_response
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create router for tax queries
@@ -36,26 +52,36 @@ async def process_query(
     """
     Process a tax law query and return AI-generated response with citations
     """
-    # Input validation
-    if not request.query.strip():
-        raise HTTPException(status_code=400, detail="Query cannot be empty")
-    
+    # QueryRequest has already stripped the query and rejected blank or
+    # over-long input
     logger.info(f"Processing tax law query: {request.query}")
     
     try:
         # Determine which model generator to use
-        if generate_with_full_model is not None and not use_mock:
+        backend = "full_model" if generate_with_full_model_async is not None and not use_mock else "inference_api"
+        
+        # Reuse the response to a recent paraphrase of this query if there is one
+        embedding = None
+        if not use_mock:
+            embedding, cached_response = await asyncio.to_thread(lookup_response, request.query, backend)
+            if cached_response is not None:
+                logger.info("Returning semantically cached response")
+                return cached_response
+        
+        if backend == "full_model":
             # Try the full model first
             logger.info("Using full local model for query processing")
-            response = generate_with_full_model(request.query)
+            response = await generate_with_full_model_async(request.query)
         else:
             # Fall back to inference API
             logger.info("Using Inference API for query processing")
-            response = generate_with_inference_api(request.query, use_mock=use_mock)
+            response = await generate_with_inference_api_async(request.query, use_mock=use_mock)
         
         # Add a note if this is a mock response
         if response.get("is_mock", False):
             logger.info("Generated mock response (API unavailable)")
+        
+        store_response(embedding, backend, response)
             
         logger.info("Query processed successfully")
         return response
@@ -63,20 +89,99 @@ async def process_query(
         logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+def _event_stream_response(events: AsyncIterator[Tuple[str, Any]]):
+    """
+    Wrap (event, data) pairs in a Server-Sent Events response, JSON-encoding the data.
+    """
+    if SSE_STARLETTE_AVAILABLE:
+        async def sse_events():
+            async for event, data in events:
+                yield {"event": event, "data": json.dumps(data)}
+        return EventSourceResponse(sse_events())
+    
+    async def raw_events():
+        async for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return StreamingResponse(
+        raw_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.post("/query/stream")
+async def stream_query(
+    request: QueryRequest,
+    http_request: Request,
+    use_mock: Optional[bool] = Query(False, description="Force using mock responses for testing")
+):
+    """
+    Process a tax law query, streaming the answer as Server-Sent Events.
+    
+    Emits a "token" event for each chunk of generated text, then a "done" event
+    with the full response and citations, or an "error" event on failure.
+    Backends that cannot stream send only the "done" event.
+    """
+    # QueryRequest has already stripped the query and rejected blank or
+    # over-long input
+    logger.info(f"Streaming tax law query: {request.query}")
+    
+    async def events():
+        try:
+            backend = "full_model" if stream_with_full_model_async is not None and not use_mock else "inference_api"
+            
+            # Reuse the response to a recent paraphrase of this query if there is one
+            embedding = None
+            if not use_mock:
+                embedding, cached_response = await asyncio.to_thread(lookup_response, request.query, backend)
+                if cached_response is not None:
+                    logger.info("Returning semantically cached response")
+                    yield "done", cached_response
+                    return
+            
+            if backend == "full_model":
+                stream = stream_with_full_model_async(request.query)
+                try:
+                    async for event, data in stream:
+                        # Stop generating for clients that have gone away
+                        if await http_request.is_disconnected():
+                            logger.info("Client disconnected, stopping generation")
+                            return
+                        if event == "done":
+                            store_response(embedding, backend, data)
+                        yield event, data
+                finally:
+                    await stream.aclose()
+            else:
+                response = await generate_with_inference_api_async(request.query, use_mock=use_mock)
+                store_response(embedding, backend, response)
+                yield "done", response
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield "error", {"detail": f"Error processing query: {str(e)}"}
+    
+    return _event_stream_response(events())
+
 # Function for debugging/manual testing
 def test_query_processing(query: str) -> Dict[str, Any]:
     """
     For debugging: Process a tax law query and return the result
     """
     try:
+        embedding, cached_response = lookup_response(query, "inference_api")
+        if cached_response is not None:
+            return cached_response
+        
         # Try the inference API first as it's lighter
-        return generate_with_inference_api(query)
+        response = generate_with_inference_api(query)
+        store_response(embedding, "inference_api", response)
+        return response
     except Exception as e:
         logger.error(f"Test query processing failed: {str(e)}")
         return {"error": str(e)}
 
 # For manual testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     test_query = "What are the tax deductions for small businesses?"
     result = test_query_processing(test_query)
     print("Query Result:", result)
@@ -11,5 +11,33 @@ API_PORT = int(os.getenv("API_PORT", "8000"))
 # CORS settings
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 
+# Queries longer than this are rejected during request validation, before any
+# retrieval, tokenization or generation work
+MAX_QUERY_CHARS = int(os.getenv("MAX_QUERY_CHARS", "2048"))
+
 # AI model settings (to be used later)
 MODEL_PATH = os.getenv("MODEL_PATH", "mistralai/Mistral-7B-v0.1")
+# Optional pre-quantized AWQ/GPTQ checkpoint of the same model for GPU inference
+# (e.g. TheBloke/Mistral-7B-v0.1-AWQ; requires autoawq or auto-gptq)
+QUANTIZED_MODEL_PATH = os.getenv("QUANTIZED_MODEL_PATH", "")
+# Opt-in: compiling forces a static KV cache, which serializes every generate
+# call (streams and batches included), and each new batch size recompiles
+USE_TORCH_COMPILE = os.getenv("USE_TORCH_COMPILE", "false").lower() == "true"
+PRELOAD_AI_ON_STARTUP = os.getenv("PRELOAD_AI_ON_STARTUP", "true").lower() == "true"
+
+# Inference API micro-batching: prompts arriving within the wait window are sent
+# as one list-input request (only enable for endpoints that accept list inputs)
+INFERENCE_API_BATCH_ENABLED = os.getenv("INFERENCE_API_BATCH_ENABLED", "false").lower() == "true"
+INFERENCE_API_MAX_BATCH = int(os.getenv("INFERENCE_API_MAX_BATCH", "8"))
+INFERENCE_API_BATCH_WAIT_MS = int(os.getenv("INFERENCE_API_BATCH_WAIT_MS", "20"))
+
+# Local model micro-batching: concurrent requests arriving within the wait window
+# share one model.generate() call
+MODEL_BATCH_SIZE = int(os.getenv("MODEL_BATCH_SIZE", "8"))
+MODEL_BATCH_WAIT_MS = int(os.getenv("MODEL_BATCH_WAIT_MS", "10"))
+
+# Semantic response cache: paraphrased queries above the cosine-similarity
+# threshold reuse a recent response instead of running retrieval and generation
+SEMANTIC_CACHE_ENABLED = os.getenv("USE_SEMANTIC_CACHE", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAXSIZE = int(os.getenv("SEMANTIC_CACHE_MAXSIZE", "10000"))
@@ -1,12 +1,17 @@
+import logging
+
+# Configure logging once for the whole application, before the modules
+# below create their loggers; library modules only call getLogger
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import logging
+import asyncio
 from app.api import query_router
-from app.config import ALLOWED_ORIGINS
+from app.config import ALLOWED_ORIGINS, PRELOAD_AI_ON_STARTUP
 from app.ai.model_manager import initialize as initialize_ai
+from app.ai.inference_api_manager import close_async_client
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -30,14 +35,24 @@ app.add_middleware(
 async def startup_event():
     logger.info("Starting up Tax Law AI API")
     try:
-        # This will pre-load the model to reduce first request latency
-        # Comment out during development as needed to speed up restarts
-        # initialize_ai()
-        # Note: If commented out, the model will load on the first request
-        logger.info("AI initialization deferred to first request")
+        if PRELOAD_AI_ON_STARTUP:
+            # Pre-load the model in a worker thread so the server starts accepting
+            # requests immediately; early requests wait on the loader's lock
+            # instead of starting a second load
+            asyncio.get_running_loop().run_in_executor(None, initialize_ai)
+            logger.info("AI initialization started in the background")
+        else:
+            # Set PRELOAD_AI_ON_STARTUP=false during development to speed up restarts
+            logger.info("AI initialization deferred to first request")
     except Exception as e:
         logger.error(f"Error during startup: {str(e)}")
 
+# Release pooled Inference API connections on shutdown
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("Shutting down Tax Law AI API")
+    await close_async_client()
+
 # Include API routes
 app.include_router(query_router)
 
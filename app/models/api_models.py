@@ -1,12 +1,20 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Optional
+from app.config import MAX_QUERY_CHARS
 
 
 class QueryRequest(BaseModel):
     """
     Model for tax law query requests
     """
-    query: str = Field(description="The tax law query to process")
+    # Strip before the length checks so blank queries fail validation
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    query: str = Field(
+        min_length=1,
+        max_length=MAX_QUERY_CHARS,
+        description="The tax law query to process"
+    )
 
 
 class Citation(BaseModel):
@@ -38,3 +38,12 @@ USE_HUGGINGFACE_API = os.getenv("USE_HUGGINGFACE_API", "true").lower() == "true"
 # Device settings (only used for local model, not for Hugging Face API)
 USE_CUDA = os.getenv("USE_CUDA", "false").lower() == "true"
 QUANTIZATION_BITS = int(os.getenv("QUANTIZATION_BITS", "16"))
+# Off by default: ModelLoader generates over a dynamic KV cache with unpadded
+# prompts, so a compiled forward pass recompiles for every new shape
+USE_TORCH_COMPILE = os.getenv("USE_TORCH_COMPILE", "false").lower() == "true"
+
+# Local generation micro-batching: concurrent requests arriving within the wait
+# window are generated together. Off by default (1) because batched rows are
+# left-padded and cannot reuse the prefilled system prompt KV cache
+GENERATION_BATCH_SIZE = int(os.getenv("GENERATION_BATCH_SIZE", "1"))
+GENERATION_BATCH_WAIT_MS = int(os.getenv("GENERATION_BATCH_WAIT_MS", "10"))
@@ -0,0 +1,35 @@
+import os
+from functools import lru_cache
+from sentence_transformers import SentenceTransformer
+from typing import Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Set ONNX=1 to run CPU embedding through the int8 ONNX Runtime encoder
+USE_ONNX = os.getenv("ONNX", "0") == "1"
+
+@lru_cache(maxsize=8)
+def get_model(name: str, device: str) -> Union[SentenceTransformer, "OnnxEncoder"]:
+    """
+    Load a sentence transformer once per (name, device) and share it.
+    
+    On CUDA the model is converted to fp16 to halve memory traffic. On CPU,
+    with ONNX=1, an int8-quantized ONNX Runtime encoder is used instead.
+    
+    Args:
+        name: Name of the sentence transformer model
+        device: Device to run the model on ("cuda" or "cpu")
+        
+    Returns:
+        The shared SentenceTransformer (or OnnxEncoder) instance
+    """
+    if USE_ONNX and device == "cpu":
+        from .onnx_encoder import OnnxEncoder
+        return OnnxEncoder(name)
+    
+    model = SentenceTransformer(name, device=device)
+    if device == "cuda":
+        model = model.half()
+    logger.info(f"Loaded embedding model: {name} on {device}")
+    return model
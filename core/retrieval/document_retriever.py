@@ -1,19 +1,35 @@
 import chromadb
-from sentence_transformers import SentenceTransformer
+import numpy as np
+import torch
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from ._models import get_model
+from .vector_store import COLLECTION_SPACE, TaxLawVectorStore
+
+# Queries embedded per forward pass in retrieve_tax_laws_batch
+QUERY_BATCH_SIZE = 32
+
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Common stopwords dropped from query keywords
+_STOPWORDS = frozenset({"the", "and", "or", "a", "an", "in", "on", "at", "to", "for", "with", "by"})
 
 class TaxLawRetriever:
     """Class for retrieving relevant tax law documents based on user queries."""
     
-    def __init__(self, collection_name: str = "tax_laws", embedding_model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, collection_name: str = "tax_laws", embedding_model_name: str = "all-MiniLM-L6-v2",
+                 vector_store: Optional[TaxLawVectorStore] = None):
         """
         Initialize the tax law retriever with ChromaDB and embedding model.
         
         Args:
             collection_name: Name of the ChromaDB collection containing tax law documents
             embedding_model_name: Name of the sentence transformer model for embeddings
+            vector_store: Vector store for the same collection whose lowercased
+                document contents are reused for keyword scoring
         """
+        self.vector_store = vector_store
+        
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(path="./db")
         
@@ -22,10 +38,24 @@ class TaxLawRetriever:
             self.collection = self.client.get_collection(collection_name)
         except ValueError:
             # Collection doesn't exist, create it
-            self.collection = self.client.create_collection(collection_name)
-        
-        # Load the embedding model
-        self.embedding_model = SentenceTransformer(embedding_model_name)
+            self.collection = self.client.create_collection(
+                collection_name, metadata={"hnsw:space": COLLECTION_SPACE}
+            )
+        
+        # Collections created before cosine became the default use squared L2,
+        # which for unit vectors is twice the cosine distance
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        self._distance_scale = 0.5 if space == "l2" else 1.0
+        
+        # The embedding model is loaded on first use, on the GPU when there is
+        # one, and shared with any other retriever or vector store using it
+        self.embedding_model_name = embedding_model_name
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+    
+    @property
+    def embedding_model(self):
+        """The shared sentence transformer, loaded on first access."""
+        return get_model(self.embedding_model_name, self.device)
     
     def retrieve_tax_laws(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
         """
@@ -38,39 +68,105 @@ class TaxLawRetriever:
         Returns:
             List of dictionaries containing relevant tax law documents with their metadata
         """
-        # Extract keywords for potential filtering
-        keywords = self._extract_keywords(query)
+        return self.retrieve_tax_laws_batch([query], n_results)[0]
+    
+    def retrieve_tax_laws_batch(self, queries: List[str], n_results: int = 3) -> List[List[Dict[str, Any]]]:
+        """
+        Searches tax law knowledge base for several queries at once.
+        
+        All queries are embedded in one encode call and sent to ChromaDB as a
+        single batched query.
+        
+        Args:
+            queries: The user's tax-related queries
+            n_results: Number of results to retrieve per query
+            
+        Returns:
+            One list of relevant tax law documents per query, in query order
+        """
+        if not queries:
+            return []
         
-        # Get query embedding
-        query_embedding = self.embedding_model.encode(query)
+        # Get query embeddings
+        query_embeddings = self.embedding_model.encode(
+            queries, batch_size=QUERY_BATCH_SIZE, convert_to_numpy=True, normalize_embeddings=True
+        )
         
         # Perform semantic search using ChromaDB
         results = self.collection.query(
-            query_embeddings=[query_embedding.tolist()],
+            query_embeddings=query_embeddings,
             n_results=n_results * 2  # Get more results than needed for filtering
         )
         
-        # Process results
-        documents = []
-        for i, (doc_id, doc_content, metadata) in enumerate(zip(
-            results["ids"][0], results["documents"][0], results["metadatas"][0]
-        )):
-            # Calculate keyword match score
-            keyword_score = self._calculate_keyword_score(doc_content, keywords)
+        distances = results.get("distances")
+        return [
+            self._rank_results(
+                query,
+                results["ids"][q],
+                results["documents"][q],
+                results["metadatas"][q],
+                distances[q] if distances else None,
+                n_results
+            )
+            for q, query in enumerate(queries)
+        ]
+    
+    def _rank_results(self, query: str, ids: List[str], contents: List[str],
+                      metadatas: List[Dict[str, Any]], distances: Optional[List[float]],
+                      n_results: int) -> List[Dict[str, Any]]:
+        """
+        Rerank one query's semantic search results with keyword matching.
+        
+        Args:
+            query: The user's tax-related query
+            ids: Candidate document ids
+            contents: Candidate document contents
+            metadatas: Candidate document metadata
+            distances: ChromaDB distances for the candidates, if returned
+            n_results: Number of results to keep
             
-            documents.append({
-                "id": doc_id,
-                "content": doc_content,
-                "metadata": metadata,
-                "relevance_score": results["distances"][0][i] if "distances" in results else 0,
-                "keyword_score": keyword_score
-            })
-        
-        # Sort by combined score (semantic + keyword)
-        documents.sort(key=lambda x: x["relevance_score"] + x["keyword_score"], reverse=True)
-        
-        # Return the top n results
-        return documents[:n_results]
+        Returns:
+            The top n candidates as dictionaries, best first
+        """
+        # Extract keywords for potential filtering
+        keywords = self._extract_keywords(query)
+        
+        # Chroma returns distances (lower is better); convert them to cosine
+        # similarity so both scores rank higher-is-better
+        if distances is not None:
+            relevance_scores = 1.0 - np.asarray(distances, dtype=np.float32) * self._distance_scale
+        else:
+            relevance_scores = np.zeros(len(ids), dtype=np.float32)
+        
+        # Calculate keyword match scores
+        keyword_scores = np.fromiter(
+            (
+                self._calculate_keyword_score(content, keywords, self._lower_content(doc_id))
+                for doc_id, content in zip(ids, contents)
+            ),
+            dtype=np.float32,
+            count=len(contents)
+        )
+        
+        # Rank by combined score (semantic + keyword) and keep the top n results
+        order = np.argsort(-(relevance_scores + keyword_scores), kind="stable")[:n_results]
+        
+        return [
+            {
+                "id": ids[i],
+                "content": contents[i],
+                "metadata": metadatas[i],
+                "relevance_score": float(relevance_scores[i]),
+                "keyword_score": float(keyword_scores[i])
+            }
+            for i in order
+        ]
+    
+    def _lower_content(self, document_id: str) -> Optional[str]:
+        """Lowercased content of a document from the vector store, if it has it."""
+        if self.vector_store is None:
+            return None
+        return self.vector_store.lower_content(document_id)
     
     def _extract_keywords(self, query: str) -> List[str]:
         """
@@ -83,21 +179,18 @@ class TaxLawRetriever:
             List of extracted keywords
         """
         # Simple keyword extraction - could be enhanced with NLP or tax-specific terms
-        words = re.findall(r'\b\w+\b', query.lower())
-        
-        # Filter out common stopwords
-        stopwords = {"the", "and", "or", "a", "an", "in", "on", "at", "to", "for", "with", "by"}
-        keywords = [word for word in words if word not in stopwords and len(word) > 2]
-        
-        return keywords
+        return [word for word in _WORD_RE.findall(query.lower())
+                if len(word) > 2 and word not in _STOPWORDS]
     
-    def _calculate_keyword_score(self, document: str, keywords: List[str]) -> float:
+    def _calculate_keyword_score(self, document: str, keywords: List[str],
+                                 document_lower: Optional[str] = None) -> float:
         """
         Calculate a score based on keyword matches in the document.
         
         Args:
             document: Tax law document content
             keywords: List of extracted keywords from the query
+            document_lower: Precomputed lowercase document content, if available
             
         Returns:
             Keyword match score
@@ -105,11 +198,16 @@ class TaxLawRetriever:
         if not keywords:
             return 0.0
         
-        # Count keyword occurrences
-        document_lower = document.lower()
-        matches = sum(1 for keyword in keywords if keyword in document_lower)
+        if document_lower is None:
+            document_lower = document.lower()
+        
+        # Tokenize the document once; the tokens give both the document length
+        # and whole-word keyword matches
+        tokens = _WORD_RE.findall(document_lower)
+        token_set = set(tokens)
+        matches = sum(1 for keyword in keywords if keyword in token_set)
         
         # Normalize score based on document length and number of keywords
-        score = matches / (len(keywords) * (len(document.split()) / 100))
+        score = matches / (len(keywords) * (max(len(tokens), 1) / 100))
         
         return min(score, 1.0)  # Cap at 1.0
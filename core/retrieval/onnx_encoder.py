@@ -0,0 +1,110 @@
+import os
+import numpy as np
+from typing import List, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Exported and quantized models are written here once and reused afterwards
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./models/onnx")
+
+class OnnxEncoder:
+    """
+    Int8-quantized ONNX Runtime encoder for CPU inference.
+    
+    Exposes the subset of the SentenceTransformer encode API used by the
+    retriever and vector store, with mean pooling over token embeddings as
+    used by the MiniLM sentence-transformers models.
+    """
+    
+    def __init__(self, model_name: str, model_dir: str = ONNX_MODEL_DIR, max_seq_length: int = 256):
+        """
+        Load the quantized ONNX model, exporting it first if needed.
+        
+        Args:
+            model_name: Name of the sentence transformer model
+            model_dir: Directory holding exported ONNX models
+            max_seq_length: Maximum number of tokens per input
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        
+        # Short names resolve to the sentence-transformers organisation, as in
+        # SentenceTransformer itself
+        if "/" not in model_name and not os.path.isdir(model_name):
+            model_name = f"sentence-transformers/{model_name}"
+        
+        export_dir = os.path.join(model_dir, model_name.replace("/", "__"))
+        quantized_path = os.path.join(export_dir, "model_quantized.onnx")
+        if not os.path.exists(quantized_path):
+            self._export(model_name, export_dir, quantized_path)
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        self.session = ort.InferenceSession(quantized_path, providers=["CPUExecutionProvider"])
+        self.max_seq_length = max_seq_length
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        logger.info(f"Loaded int8 ONNX encoder from {quantized_path}")
+    
+    @staticmethod
+    def _export(model_name: str, export_dir: str, quantized_path: str) -> None:
+        """
+        Export the model to ONNX and quantize its weights to int8.
+        
+        Args:
+            model_name: Hugging Face name of the model
+            export_dir: Directory to write the exported model and tokenizer to
+            quantized_path: Path of the quantized model file
+        """
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        from transformers import AutoTokenizer
+        
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+        ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+        quantize_dynamic(
+            os.path.join(export_dir, "model.onnx"),
+            quantized_path,
+            weight_type=QuantType.QInt8
+        )
+    
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Embed one sentence or a list of sentences.
+        
+        Args:
+            sentences: Sentence or list of sentences to embed
+            batch_size: Number of sentences per forward pass
+            convert_to_numpy: Accepted for compatibility; results are always NumPy arrays
+            normalize_embeddings: Whether to scale embeddings to unit length
+            show_progress_bar: Accepted for compatibility; no progress bar is shown
+        
+        Returns:
+            Float32 embedding for a single sentence, or one row per sentence
+        """
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            encoded = self.tokenizer(
+                sentences[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            feeds = {name: value.astype(np.int64) for name, value in encoded.items() if name in self._input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+            
+            # Mean-pool the token embeddings, ignoring padding
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            batches.append((token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9))
+        
+        embeddings = np.concatenate(batches).astype(np.float32) if batches else np.empty((0, 0), dtype=np.float32)
+        if normalize_embeddings and len(embeddings):
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        
+        return embeddings[0] if single else embeddings
@@ -1,10 +1,140 @@
 import chromadb
-from sentence_transformers import SentenceTransformer
+import torch
+import numpy as np
+import hashlib
+import os
+import sqlite3
+import threading
 from typing import List, Dict, Any, Optional
 import logging
+from ._models import get_model
 
 logger = logging.getLogger(__name__)
 
+# Try to import blake3 for fast content hashing, with a fallback to BLAKE2
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+# Documents are embedded in chunks of this many contents so peak memory stays
+# bounded on large ingests; each chunk is one batched encode call
+ENCODE_CHUNK_SIZE = 1024
+ENCODE_BATCH_SIZE = 64
+
+# Contents handed to each worker at a time by bulk_add_documents
+MULTI_PROCESS_CHUNK_SIZE = 500
+
+# Documents per collection.add call, within ChromaDB's recommended 50-250 range
+ADD_BATCH_SIZE = 100
+
+# Embeddings already computed for a (content, model) pair are kept here so
+# re-ingesting unchanged documents skips the transformer entirely
+EMBED_CACHE_PATH = "./db/embedding_cache.sqlite3"
+
+# Embeddings are unit-normalized, so new collections rank by cosine distance
+COLLECTION_SPACE = "cosine"
+
+# SQLite caps the number of bound parameters per statement
+_SQLITE_MAX_PARAMS = 500
+
+
+class EmbedCache:
+    """
+    SQLite-backed store of document embeddings keyed by content and model name.
+    
+    Vectors are stored as float16, half the space of float32 and close enough
+    that cache hits rank the same as fresh encodes.
+    """
+    
+    def __init__(self, path: str, model_name: str):
+        """
+        Open (or create) the embedding cache.
+        
+        Args:
+            path: Path of the SQLite database file
+            model_name: Name of the embedding model, mixed into every key
+        """
+        self._model_suffix = b"|" + model_name.encode()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings_f16 (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._migrate_old_tables()
+    
+    def _migrate_old_tables(self) -> None:
+        """Convert rows of the old float32 table to float16 and drop the old tables."""
+        tables = {name for (name,) in self._conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('embeddings', 'embeddings_int8')"
+        )}
+        
+        if "embeddings" in tables:
+            rows = self._conn.execute("SELECT key, vector FROM embeddings").fetchall()
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings_f16 VALUES (?, ?)",
+                [(key, np.frombuffer(vector, dtype=np.float32).astype(np.float16).tobytes()) for key, vector in rows]
+            )
+            self._conn.execute("DROP TABLE embeddings")
+            logger.info(f"Migrated {len(rows)} cached embeddings to float16")
+        
+        # int8 rows cannot be restored to full precision, so they are re-encoded on demand
+        if "embeddings_int8" in tables:
+            self._conn.execute("DROP TABLE embeddings_int8")
+    
+    def _key(self, content: str) -> bytes:
+        """Hash a content string together with the model name."""
+        data = content.encode() + self._model_suffix
+        if BLAKE3_AVAILABLE:
+            return blake3.blake3(data).digest()
+        return hashlib.blake2b(data, digest_size=32).digest()
+    
+    def get_many(self, contents: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached embeddings.
+        
+        Args:
+            contents: Text contents to look up
+            
+        Returns:
+            One float32 vector per content, or None where the content is not cached
+        """
+        keys = [self._key(content) for content in contents]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _SQLITE_MAX_PARAMS):
+                batch = keys[start:start + _SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings_f16 WHERE key IN ({placeholders})", batch
+                )
+                found.update(rows)
+        return [
+            np.frombuffer(found[key], dtype=np.float16).astype(np.float32) if key in found else None
+            for key in keys
+        ]
+    
+    def put_many(self, contents: List[str], embeddings: np.ndarray) -> None:
+        """
+        Store embeddings for the given contents.
+        
+        Only the cached copies are stored as float16; callers keep using the
+        float32 embeddings they passed in.
+        
+        Args:
+            contents: Text contents that were embedded
+            embeddings: Embeddings for the contents, one row per content
+        """
+        rows = [
+            (self._key(content), embedding.astype(np.float16).tobytes())
+            for content, embedding in zip(contents, embeddings)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings_f16 VALUES (?, ?)", rows)
+
+
 class TaxLawVectorStore:
     """Class for managing the vector database of tax law documents."""
     
@@ -25,12 +155,40 @@ class TaxLawVectorStore:
             logger.info(f"Using existing collection: {collection_name}")
         except ValueError:
             # Collection doesn't exist, create it
-            self.collection = self.client.create_collection(collection_name)
+            self.collection = self.client.create_collection(
+                collection_name, metadata={"hnsw:space": COLLECTION_SPACE}
+            )
             logger.info(f"Created new collection: {collection_name}")
         
-        # Load the embedding model
-        self.embedding_model = SentenceTransformer(embedding_model_name)
-        logger.info(f"Loaded embedding model: {embedding_model_name}")
+        # The embedding model is loaded on first use, on the GPU when there is
+        # one, and shared with any other retriever or vector store using it
+        self.embedding_model_name = embedding_model_name
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        # Cached vectors are normalized, so keep them apart from any unnormalized
+        # entries for the same model
+        self.embed_cache = EmbedCache(EMBED_CACHE_PATH, f"{embedding_model_name}|normalized")
+        
+        # Lowercased content of documents added through this store, by id, so
+        # keyword scoring in the retriever does not re-lowercase candidates
+        self._lower_contents: Dict[str, str] = {}
+    
+    @property
+    def embedding_model(self):
+        """The shared sentence transformer, loaded on first access."""
+        return get_model(self.embedding_model_name, self.device)
+    
+    def lower_content(self, document_id: str) -> Optional[str]:
+        """
+        Get the lowercased content of a document added through this store.
+        
+        Args:
+            document_id: Unique identifier for the document
+            
+        Returns:
+            Lowercased document content, or None if the document is not known
+        """
+        return self._lower_contents.get(document_id)
     
     def add_document(self, document_id: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
         """
@@ -45,49 +203,161 @@ class TaxLawVectorStore:
             metadata = {}
         
         # Generate embedding for the document
-        embedding = self.embedding_model.encode(content)
+        embedding = self._encode_contents([content])[0]
         
         # Add document to ChromaDB
         self.collection.add(
             ids=[document_id],
-            embeddings=[embedding.tolist()],
+            embeddings=embedding.reshape(1, -1),
             documents=[content],
             metadatas=[metadata]
         )
+        self._lower_contents[document_id] = content.lower()
         
         logger.info(f"Added document {document_id} to vector store")
     
-    def add_documents(self, documents: List[Dict[str, Any]]) -> None:
+    def add_documents(self, documents: List[Dict[str, Any]], batch_size: int = ADD_BATCH_SIZE) -> None:
         """
         Add multiple tax law documents to the vector store.
         
         Args:
             documents: List of document dictionaries with id, content, and metadata
+            batch_size: Number of documents written to ChromaDB per add call
         """
-        ids = []
-        contents = []
-        metadatas = []
-        embeddings = []
+        self._add_documents(documents, batch_size)
+    
+    def bulk_add_documents(self, documents: List[Dict[str, Any]], processes: Optional[int] = None,
+                           batch_size: int = ADD_BATCH_SIZE) -> None:
+        """
+        Add a large set of tax law documents, embedding them in worker processes.
         
-        for doc in documents:
-            ids.append(doc["id"])
-            contents.append(doc["content"])
-            metadatas.append(doc.get("metadata", {}))
-            
-            # Generate embedding for the document
-            embedding = self.embedding_model.encode(doc["content"])
-            embeddings.append(embedding.tolist())
+        Encoding is spread over one process per CPU core (or per GPU when CUDA
+        is available), which scales past the GIL and PyTorch's intra-op
+        threading on many-core machines. For small sets the pool startup cost
+        outweighs the gain; use add_documents instead.
         
-        # Add documents to ChromaDB
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=contents,
-            metadatas=metadatas
-        )
+        Args:
+            documents: List of document dictionaries with id, content, and metadata
+            processes: Number of CPU worker processes (defaults to the CPU count)
+            batch_size: Number of documents written to ChromaDB per add call
+        """
+        # The ONNX encoder has no process pool; it is already fast on CPU
+        if not hasattr(self.embedding_model, "start_multi_process_pool"):
+            self._add_documents(documents, batch_size)
+            return
+        
+        if torch.cuda.is_available():
+            target_devices = None
+        else:
+            target_devices = ["cpu"] * (processes or os.cpu_count() or 1)
+        
+        pool = self.embedding_model.start_multi_process_pool(target_devices)
+        try:
+            self._add_documents(documents, batch_size, pool)
+        finally:
+            self.embedding_model.stop_multi_process_pool(pool)
+    
+    def _add_documents(self, documents: List[Dict[str, Any]], batch_size: int,
+                       pool: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Embed documents and write them to ChromaDB.
+        
+        Args:
+            documents: List of document dictionaries with id, content, and metadata
+            batch_size: Number of documents written to ChromaDB per add call
+            pool: Multi-process encode pool, or None to encode in this process
+        """
+        ids = [doc["id"] for doc in documents]
+        contents = [doc["content"] for doc in documents]
+        metadatas = [doc.get("metadata", {}) for doc in documents]
+        
+        # Generate embeddings in length-homogeneous batches
+        embeddings = self._encode_contents(contents, pool)
+        
+        # Add documents to ChromaDB in sub-batches; very large single adds slow
+        # down HNSW index writes
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            self.collection.add(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end],
+                documents=contents[start:end],
+                metadatas=metadatas[start:end]
+            )
+        self._lower_contents.update(zip(ids, (content.lower() for content in contents)))
         
         logger.info(f"Added {len(documents)} documents to vector store")
     
+    def _encode_contents(self, contents: List[str], pool: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """
+        Embed contents, reusing cached embeddings and encoding only the misses.
+        
+        Args:
+            contents: Text contents to embed
+            pool: Multi-process encode pool, or None to encode in this process
+            
+        Returns:
+            Float32 array of embeddings, one row per content, in the order given
+        """
+        cached = self.embed_cache.get_many(contents)
+        misses = [i for i, embedding in enumerate(cached) if embedding is None]
+        
+        if misses:
+            miss_contents = [contents[i] for i in misses]
+            miss_embeddings = self._batch_encode(miss_contents, pool).astype(np.float32)
+            self.embed_cache.put_many(miss_contents, miss_embeddings)
+            for i, embedding in zip(misses, miss_embeddings):
+                cached[i] = embedding
+        
+        logger.debug(f"Embedding cache: {len(contents) - len(misses)} hits, {len(misses)} misses")
+        if not cached:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(cached)
+    
+    def _batch_encode(self, contents: List[str], pool: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """
+        Embed contents in length-sorted chunks and return them in input order.
+        
+        Sorting by length before chunking keeps each batch close to uniform
+        length, so little of the encode time is spent on padding tokens.
+        
+        Args:
+            contents: Text contents to embed
+            pool: Multi-process encode pool, or None to encode in this process
+            
+        Returns:
+            Array of embeddings, one row per content, in the order given
+        """
+        # Word count is a cheap proxy for token length
+        order = np.argsort([len(content.split()) for content in contents], kind="stable")
+        sorted_contents = [contents[i] for i in order]
+        
+        if pool is not None and sorted_contents:
+            # Workers take contiguous chunks, so each still sees similar lengths
+            embeddings_sorted = self.embedding_model.encode_multi_process(
+                sorted_contents, pool, batch_size=ENCODE_BATCH_SIZE, chunk_size=MULTI_PROCESS_CHUNK_SIZE
+            )
+            norms = np.linalg.norm(embeddings_sorted, axis=1, keepdims=True)
+            embeddings_sorted = embeddings_sorted / np.maximum(norms, 1e-12)
+        else:
+            # One batched encode call per chunk to bound peak memory
+            chunks = [
+                self.embedding_model.encode(
+                    sorted_contents[start:start + ENCODE_CHUNK_SIZE],
+                    batch_size=ENCODE_BATCH_SIZE,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                )
+                for start in range(0, len(sorted_contents), ENCODE_CHUNK_SIZE)
+            ]
+            embeddings_sorted = np.concatenate(chunks) if chunks else np.empty((0, 0), dtype=np.float32)
+        
+        # Scatter back to the original document order
+        embeddings = np.empty_like(embeddings_sorted)
+        embeddings[order] = embeddings_sorted
+        return embeddings
+    
     def delete_document(self, document_id: str) -> None:
         """
         Delete a document from the vector store.
@@ -96,6 +366,7 @@ class TaxLawVectorStore:
             document_id: Unique identifier for the document to delete
         """
         self.collection.delete(ids=[document_id])
+        self._lower_contents.pop(document_id, None)
         logger.info(f"Deleted document {document_id} from vector store")
     
     def update_document(self, document_id: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
@@ -107,11 +378,20 @@ class TaxLawVectorStore:
             content: Updated text content of the document
             metadata: Updated metadata for the document
         """
-        # Delete the existing document
-        self.delete_document(document_id)
+        if metadata is None:
+            metadata = {}
         
-        # Add the updated document
-        self.add_document(document_id, content, metadata)
+        # Generate embedding for the updated document
+        embedding = self._encode_contents([content])[0]
+        
+        # Replace the document in a single ChromaDB write
+        self.collection.upsert(
+            ids=[document_id],
+            embeddings=embedding.reshape(1, -1),
+            documents=[content],
+            metadatas=[metadata]
+        )
+        self._lower_contents[document_id] = content.lower()
         
         logger.info(f"Updated document {document_id} in vector store")
     
@@ -6,6 +6,53 @@ integrating retrieved context from tax databases and ensuring responses
 include proper citations and legal references.
 """
 
+import copy
+import threading
+import weakref
+from functools import lru_cache
+
+# Try to import PyTorch for prefix KV caching in generate_tax_law_response
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+# Every prompt from create_tax_query_prompt starts with this text, which lets
+# local generation tokenize it once and reuse the ids
+TAX_QUERY_SYSTEM_INSTRUCTION = (
+    "You are a tax law assistant providing accurate information based on official tax regulations. "
+    "Answer the following tax question using the provided tax law references. "
+    "Be concise, accurate, and focus only on factual information from authoritative sources."
+)
+TAX_QUERY_PROMPT_PREFIX = f"{TAX_QUERY_SYSTEM_INSTRUCTION}\n\nTAX LAW REFERENCES:\n"
+
+TAX_QUERY_CITATION_INSTRUCTION = (
+    "Important: In your answer, cite specific references by their number (e.g., [1], [2]) "
+    "when using information from them. If information is not found in the provided references, "
+    "clearly state this rather than providing uncertain information."
+)
+
+# Text between the references and the user question, with and without the
+# citation instruction
+_CITATION_SEPARATOR = f"\n\n{TAX_QUERY_CITATION_INSTRUCTION}\n\nUSER QUESTION: "
+_PLAIN_SEPARATOR = "\n\n\n\nUSER QUESTION: "
+_PROMPT_SUFFIX = "\n\nANSWER:"
+
+# Repeat queries that retrieve the same references produce the same prompt
+PROMPT_CACHE_SIZE = 1024
+
+# Prompts with up to this many references are filled into a precompiled
+# template for their (reference count, citations) shape
+MAX_TEMPLATED_REFERENCES = 5
+
+# Prefill key/value state of TAX_QUERY_PROMPT_PREFIX, one entry per model. Only
+# the static instructions are cached: they are shared by every prompt and small,
+# whereas prefixes including the references would rarely repeat and cost far
+# more GPU memory. Models are held weakly so their entries go away with them.
+_prefix_kv_cache = weakref.WeakKeyDictionary()
+_prefix_kv_lock = threading.Lock()
+
 def create_tax_query_prompt(query, context_docs, include_citations=True):
     """
     Creates an optimized prompt for tax law queries with relevant context.
@@ -18,45 +65,69 @@ def create_tax_query_prompt(query, context_docs, include_citations=True):
     Returns:
         str: A formatted prompt ready for the LLM
     """
-    # Start with a clear system instruction
-    system_instruction = (
-        "You are a tax law assistant providing accurate information based on official tax regulations. "
-        "Answer the following tax question using the provided tax law references. "
-        "Be concise, accurate, and focus only on factual information from authoritative sources."
+    # Key the cache on the rendered reference fields rather than the document
+    # dicts, which are unhashable and rebuilt by every retrieval
+    references = tuple(
+        (str(doc.get('source', f'Reference {i}')), str(doc.get('content', '')))
+        for i, doc in enumerate(context_docs, 1)
     )
+    return _build_tax_query_prompt(query, references, include_citations)
+
+
+@lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def _build_tax_query_prompt(query, references, include_citations):
+    """
+    Assembles the prompt for create_tax_query_prompt.
     
-    # Format the retrieved context documents
-    formatted_context = ""
-    for i, doc in enumerate(context_docs, 1):
-        # Extract document content and source
-        content = doc.get("content", "")
-        source = doc.get("source", f"Reference {i}")
-        
-        # Add to the formatted context with clear citation
-        formatted_context += f"Reference [{i}]: {source}\n{content}\n\n"
+    Args:
+        query (str): The user's tax law question
+        references (tuple): (source, content) pairs for each context document
+        include_citations (bool): Whether to instruct the model to include citations
     
-    # Build citation instruction if needed
-    citation_instruction = ""
-    if include_citations:
-        citation_instruction = (
-            "Important: In your answer, cite specific references by their number (e.g., [1], [2]) "
-            "when using information from them. If information is not found in the provided references, "
-            "clearly state this rather than providing uncertain information."
-        )
+    Returns:
+        str: A formatted prompt ready for the LLM
+    """
+    # Common shapes fill a precompiled template in a single format call
+    if len(references) <= MAX_TEMPLATED_REFERENCES:
+        template = _tax_query_prompt_template(len(references), include_citations)
+        return template.format(*(field for reference in references for field in reference), query)
+    
+    # Format the retrieved context documents, each with a clear citation,
+    # joining once instead of growing a string inside the loop
+    formatted_context = "".join(
+        f"Reference [{i}]: {source}\n{content}\n\n"
+        for i, (source, content) in enumerate(references, 1)
+    )
     
-    # Final prompt assembly
-    prompt = f"""{system_instruction}
-
-TAX LAW REFERENCES:
-{formatted_context}
+    # Final prompt assembly from the static pieces
+    separator = _CITATION_SEPARATOR if include_citations else _PLAIN_SEPARATOR
+    return "".join((TAX_QUERY_PROMPT_PREFIX, formatted_context, separator, query, _PROMPT_SUFFIX))
 
-{citation_instruction}
 
-USER QUESTION: {query}
-
-ANSWER:"""
+@lru_cache(maxsize=2 * (MAX_TEMPLATED_REFERENCES + 1))
+def _tax_query_prompt_template(n_references, include_citations):
+    """
+    Builds a str.format template for prompts with a given number of references.
+    
+    Args:
+        n_references (int): Number of context documents
+        include_citations (bool): Whether to instruct the model to include citations
     
-    return prompt
+    Returns:
+        str: Template with positional fields for each reference's source and
+        content, followed by one for the query
+    """
+    def escape(text):
+        return text.replace("{", "{{").replace("}", "}}")
+    
+    separator = _CITATION_SEPARATOR if include_citations else _PLAIN_SEPARATOR
+    return "".join((
+        escape(TAX_QUERY_PROMPT_PREFIX),
+        "".join(f"Reference [{i}]: {{}}\n{{}}\n\n" for i in range(1, n_references + 1)),
+        escape(separator),
+        "{}",
+        escape(_PROMPT_SUFFIX),
+    ))
 
 
 def format_ai_response_with_citations(response, context_docs):
@@ -94,7 +165,7 @@ def generate_tax_law_response(query, context_docs, model, tokenizer, max_length=
         context_docs (list): Relevant tax law documents retrieved
         model: The LLM model (Mistral, Llama, etc.)
         tokenizer: The tokenizer for the model
-        max_length (int): Maximum response length
+        max_length (int): Maximum number of tokens to generate for the answer
         
     Returns:
         dict: A formatted response with citations
@@ -103,26 +174,76 @@ def generate_tax_law_response(query, context_docs, model, tokenizer, max_length=
     prompt = create_tax_query_prompt(query, context_docs)
     
     # Prepare for model inference
-    inputs = tokenizer(prompt, return_tensors="pt", truncation=True)
-    
-    # Generate response from the model
-    outputs = model.generate(
-        **inputs, 
-        max_length=max_length,
+    inputs = tokenizer(
+        prompt, return_tensors="pt", truncation=True, return_attention_mask=True
+    ).to(model.device)
+    prompt_len = inputs["input_ids"].shape[1]
+    
+    # Every prompt starts with the same instructions, so their prefill is
+    # computed once per model and reused. The prefix ends on a newline so it
+    # tokenizes the same alone as inside the prompt.
+    prefix_kv = None
+    if TORCH_AVAILABLE and prompt.startswith(TAX_QUERY_PROMPT_PREFIX):
+        prefix_state = _get_prefix_state(model, tokenizer)
+        # Only reuse the cache when the prompt's own ids start with the prefix
+        # ids and leave at least one token to prefill
+        if prefix_state is not None:
+            prefix_ids, cached_kv = prefix_state
+            n_prefix = prefix_ids.shape[1]
+            if prompt_len > n_prefix and torch.equal(inputs["input_ids"][:, :n_prefix], prefix_ids):
+                prefix_kv = cached_kv
+    
+    generation_kwargs = dict(
+        max_new_tokens=max_length,
         temperature=0.3,  # Lower temperature for more factual responses
         do_sample=True,
         top_p=0.9,
-        repetition_penalty=1.2  # Discourage repetitive text
+        repetition_penalty=1.2,  # Discourage repetitive text
+        pad_token_id=tokenizer.eos_token_id,
+        use_cache=True
     )
+    if prefix_kv is not None:
+        # generate extends the cache in place, so hand it a copy
+        generation_kwargs["past_key_values"] = copy.deepcopy(prefix_kv)
     
-    # Decode the model output
-    response_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    # Generate response from the model
+    outputs = model.generate(**inputs, **generation_kwargs)
+    
+    # Decode only the generated answer tokens, not the echoed prompt
+    response_text = tokenizer.decode(outputs[0][prompt_len:], skip_special_tokens=True).strip()
     
-    # Clean up the response to extract just the answer part
-    if "ANSWER:" in prompt and "ANSWER:" in response_text:
-        response_text = response_text.split("ANSWER:", 1)[1].strip()
-        
     # Format with proper citations
     formatted_response = format_ai_response_with_citations(response_text, context_docs)
     
     return formatted_response
+
+
+def _get_prefix_state(model, tokenizer):
+    """
+    Returns the token ids and prefill key/value cache for TAX_QUERY_PROMPT_PREFIX.
+    
+    Args:
+        model: The LLM model
+        tokenizer: The tokenizer for the model
+    
+    Returns:
+        tuple: (prefix_ids, past_key_values), or None if the prefix is too long
+        to leave room for the question within the model's context
+    """
+    with _prefix_kv_lock:
+        state = _prefix_kv_cache.get(model)
+    if state is not None:
+        return state
+    
+    prefix_ids = tokenizer(TAX_QUERY_PROMPT_PREFIX, return_tensors="pt", add_special_tokens=True)["input_ids"]
+    if prefix_ids.shape[1] >= tokenizer.model_max_length:
+        return None
+    prefix_ids = prefix_ids.to(model.device)
+    
+    with torch.inference_mode():
+        prefix_kv = model(input_ids=prefix_ids, use_cache=True).past_key_values
+    
+    state = (prefix_ids, prefix_kv)
+    with _prefix_kv_lock:
+        _prefix_kv_cache[model] = state
+    return state
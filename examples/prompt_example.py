@@ -7,27 +7,26 @@ def generate_tax_law_response_with_device(query, context_docs, model, tokenizer,
     device = next(model.parameters()).device
     
     # Prepare for model inference with proper device placement
-    inputs = tokenizer(prompt, return_tensors="pt", truncation=True)
+    inputs = tokenizer(prompt, return_tensors="pt", truncation=True, return_attention_mask=True)
     # Move inputs to the same device as the model
     inputs = {k: v.to(device) for k, v in inputs.items()}
     
     # Generate response from the model
     outputs = model.generate(
         **inputs, 
-        max_length=max_length,
+        max_new_tokens=max_length,
         temperature=0.3,  # Lower temperature for more factual responses
         do_sample=True,
         top_p=0.9,
-        repetition_penalty=1.2  # Discourage repetitive text
+        repetition_penalty=1.2,  # Discourage repetitive text
+        pad_token_id=tokenizer.eos_token_id,
+        use_cache=True
     )
     
-    # Decode the model output
-    response_text = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    # Decode only the generated answer tokens, not the echoed prompt
+    prompt_len = inputs["input_ids"].shape[1]
+    response_text = tokenizer.decode(outputs[0][prompt_len:], skip_special_tokens=True).strip()
     
-    # Clean up the response to extract just the answer part
-    if "ANSWER:" in prompt and "ANSWER:" in response_text:
-        response_text = response_text.split("ANSWER:", 1)[1].strip()
-        
     # Format with proper citations
     formatted_response = format_ai_response_with_citations(response_text, context_docs)
     
@@ -44,7 +44,7 @@ def main():
     vector_store.add_documents(tax_laws)
     
     # Initialize retriever
-    retriever = TaxLawRetriever()
+    retriever = TaxLawRetriever(vector_store=vector_store)
     
     # Test with a sample query
     query = "What are the tax deductions for small business equipment purchases?"
@@ -86,14 +86,16 @@ def main():
         "What are the requirements for depreciating property?"
     ]
     
-    for query in test_queries:
+    # Run all test queries as one batched search
+    results = kb.search_batch(test_queries, n_results=1)
+    
+    for i, query in enumerate(test_queries):
         print(f"\nSearch Query: '{query}'")
-        results = kb.search(query, n_results=1)
         
-        if results["documents"] and results["documents"][0]:
+        if results["documents"] and results["documents"][i]:
             print("Top Result:")
-            doc = results["documents"][0][0]
-            metadata = results["metadatas"][0][0]
+            doc = results["documents"][i][0]
+            metadata = results["metadatas"][i][0]
             print(f"Source: {metadata.get('title', 'Unknown')}")
             print(f"Content Preview: {doc[:150]}...")
         else:
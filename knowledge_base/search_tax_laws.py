@@ -6,6 +6,7 @@ import os
 import sys
 import logging
 import argparse
+from functools import lru_cache
 from pathlib import Path
 import textwrap
 
@@ -39,31 +40,49 @@ def format_results(results, max_width=100):
     
     formatted_output = []
     
+    # Build the wrapper and separators once for all results
+    wrapper = textwrap.TextWrapper(width=max_width)
+    sep_eq = "=" * max_width
+    sep_dash = "-" * max_width
+    
     for i, (doc, metadata) in enumerate(zip(results["documents"][0], results["metadatas"][0])):
         # Format document metadata
         title = metadata.get("title", "Unknown Document")
         source = metadata.get("source", "Unknown Source")
         doc_id = metadata.get("document_id", "Unknown ID")
         
-        # Format content with wrapped text
-        content = doc.strip()
-        wrapped_content = textwrap.fill(content, width=max_width)
-        
-        # Assemble the formatted result
-        result = f"\n{'='*max_width}\n"
-        result += f"RESULT {i+1}\n"
-        result += f"{'='*max_width}\n"
-        result += f"Title: {title}\n"
-        result += f"Source: {source}\n"
-        result += f"Document ID: {doc_id}\n"
-        result += f"{'-'*max_width}\n"
-        result += f"{wrapped_content}\n"
-        
-        formatted_output.append(result)
+        # Assemble the formatted result with the content wrapped, in one join
+        formatted_output.append("\n".join((
+            "",
+            sep_eq,
+            f"RESULT {i+1}",
+            sep_eq,
+            f"Title: {title}",
+            f"Source: {source}",
+            f"Document ID: {doc_id}",
+            sep_dash,
+            wrapper.fill(doc.strip()),
+            ""
+        )))
     
     return "\n".join(formatted_output)
 
 
+@lru_cache(maxsize=512)
+def _embed(kb, query):
+    """
+    Embed a normalized query, reusing the result for repeat queries.
+    
+    Args:
+        kb: The knowledge base instance
+        query: Stripped, lowercased query text
+        
+    Returns:
+        Query embedding as a tuple of floats
+    """
+    return tuple(kb.vector_store.embedding_generator.generate_embedding(query))
+
+
 def interactive_search(kb, max_results=3):
     """
     Run an interactive search session.
@@ -92,8 +111,10 @@ def interactive_search(kb, max_results=3):
             continue
         
         try:
-            # Search the knowledge base
-            results = kb.search(query, n_results=max_results)
+            # Search the knowledge base, embedding each distinct query only once
+            # (the embedding model is uncased, so lowercasing does not change it)
+            query_embedding = _embed(kb, query.strip().lower())
+            results = kb.search(query, n_results=max_results, query_embedding=list(query_embedding))
             
             # Display results
             print("\nSearch Results:")
@@ -107,7 +128,9 @@ def interactive_search(kb, max_results=3):
 def main():
     """Main function to run the tax law search tool."""
     parser = argparse.ArgumentParser(description="Search for tax law information.")
-    parser.add_argument("--query", "-q", type=str, help="The search query (if not provided, runs in interactive mode)")
+    parser.add_argument("--query", "-q", type=str, action="append",
+                        help="A search query; may be repeated (if no queries are given, runs in interactive mode)")
+    parser.add_argument("--queries-file", "-f", type=str, help="File with one search query per line")
     parser.add_argument("--results", "-r", type=int, default=3, help="Number of results to display (default: 3)")
     parser.add_argument("--directory", "-d", type=str, help="Path to knowledge base directory")
     
@@ -129,10 +152,24 @@ def main():
         print("WARNING: The knowledge base appears to be empty. Run populate_knowledge_base.py first.")
         return
     
-    if args.query:
+    queries = list(args.query or [])
+    if args.queries_file:
+        with open(args.queries_file, 'r', encoding='utf-8') as f:
+            queries.extend(line.strip() for line in f if line.strip())
+    
+    if len(queries) == 1:
         # Single query mode
-        results = kb.search(args.query, n_results=args.results)
+        results = kb.search(queries[0], n_results=args.results)
         print(format_results(results))
+    elif queries:
+        # Batch mode: all queries go to the knowledge base in one search
+        results = kb.search_batch(queries, n_results=args.results)
+        for i, query in enumerate(queries):
+            print(f"\nQuery: {query}")
+            print(format_results({
+                "documents": [results["documents"][i]],
+                "metadatas": [results["metadatas"][i]]
+            }))
     else:
         # Interactive mode
         interactive_search(kb, max_results=args.results)
@@ -78,13 +78,19 @@ def setup_vector_db():
     It's used to verify that ChromaDB is set up correctly and can store embeddings.
     """
     
+    # Pre-embed the sample chunks as a float32 array so the vector store passes
+    # one contiguous buffer to ChromaDB
+    sample_chunks = vector_store.embedding_generator.chunk_document(sample_text, chunk_size=512, overlap=50)
+    sample_embeddings = vector_store.embedding_generator.generate_embedding_array(sample_chunks)
+    
     # Add the sample document to verify everything works
     chunk_ids = vector_store.add_document(
         document_id=sample_metadata.document_id,
         text=sample_text,
         metadata=sample_metadata,
         chunk_size=512,
-        chunk_overlap=50
+        chunk_overlap=50,
+        embeddings=sample_embeddings
     )
     
     # Wait a moment for ChromaDB to process embeddings
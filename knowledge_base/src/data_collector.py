@@ -2,15 +2,25 @@
 Module for collecting and downloading tax law documents from various sources.
 """
 import os
+import sys
+import asyncio
 import logging
-import requests
-from typing import List, Dict, Any, Optional
+import httpx
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 from pathlib import Path
-import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 from .schema import TaxLawMetadata
 
+# Try to import orjson for fast metadata serialization, with a fallback to stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 # Configure logging
 logging.basicConfig(
@@ -19,6 +29,151 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Publications fetched at once, to stay polite to irs.gov
+MAX_CONCURRENT_DOWNLOADS = 3
+
+# Bytes gathered from the response per write to disk; httpx re-chunks the
+# stream to this size, so each write is one large syscall
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+
+# Threads used to write sample documents and their metadata files
+SAMPLE_WRITE_WORKERS = 6
+
+# Sample content for common IRS publications, keyed by publication number
+_SAMPLE_CONTENT: Mapping[str, str] = MappingProxyType({
+    sys.intern("535"): """
+## Business Expenses
+
+### Introduction
+This publication discusses common business expenses and explains what is and is not deductible.
+
+### What's New
+For tax years beginning in 2023, the maximum section 179 expense deduction is $1,160,000.
+This limit is reduced by the amount by which the cost of section 179 property placed in
+service during the tax year exceeds $2,890,000.
+
+### Deducting Business Expenses
+To be deductible, a business expense must be both ordinary and necessary. An ordinary expense
+is one that is common and accepted in your trade or business. A necessary expense is one that
+is helpful and appropriate for your trade or business.
+
+### Business Use of Your Home
+If you use part of your home for business, you may be able to deduct expenses for the business
+use of your home. These expenses may include mortgage interest, insurance, utilities, repairs,
+and depreciation.
+
+### Car and Truck Expenses
+If you use your car or truck in your business, you may be able to deduct the costs of operating
+and maintaining your vehicle. You can either deduct the actual expenses or use the standard
+mileage rate.
+""",
+    sys.intern("17"): """
+## Your Federal Income Tax For Individuals
+
+### Introduction
+This publication covers the general rules for filing a federal income tax return.
+
+### What's New
+For 2023, the standard deduction has increased to $13,850 for single filers and $27,700 for
+married couples filing jointly.
+
+### Filing Requirements
+You must file a federal income tax return if your income is above a certain level, which varies
+depending on your filing status, age, and the type of income you received.
+
+### Filing Status
+Your filing status is used to determine your filing requirements, standard deduction, eligibility
+for certain credits, and your correct tax. There are five filing statuses: Single, Married Filing
+Jointly, Married Filing Separately, Head of Household, and Qualifying Surviving Spouse.
+
+### Dependents
+You can claim a dependent on your tax return if they meet certain tests. This can affect your
+eligibility for certain tax benefits.
+""",
+    sys.intern("225"): """
+## Farmer's Tax Guide
+
+### Introduction
+This publication explains how the federal tax laws apply to farming.
+
+### What's New
+For 2023, the maximum amount you can elect to deduct for most section 179 property you placed
+in service in 2023 is $1,160,000.
+
+### Farm Income
+You must include various types of income on your tax return, including income from the sale of
+livestock, produce, grains, and other products you raised.
+
+### Farm Business Expenses
+The ordinary and necessary costs of operating a farm for profit are deductible business expenses.
+These include the costs of feed, seed, fertilizer, and similar farm supplies.
+
+### Depreciation, Section 179 Deduction, and Special Depreciation Allowance
+If you buy farm property such as machinery, equipment, or structures that have a useful life of
+more than a year, you generally cannot deduct the entire cost in the year you buy it. Instead,
+you must depreciate these assets.
+"""
+})
+
+_DEFAULT_SAMPLE_CONTENT = (
+    "Sample content for IRS Publication {}. This is placeholder text for demonstration purposes."
+)
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    """
+    Write data as indented UTF-8 JSON.
+    
+    Args:
+        path: Path of the JSON file
+        data: JSON-serializable data
+    """
+    if ORJSON_AVAILABLE:
+        encoded = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        encoded = json.dumps(data, indent=2).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(encoded)
+
+
+def _write_topic(topic: Dict[str, str], documents_directory: str) -> str:
+    """
+    Write a sample tax law document and its metadata file.
+    
+    Args:
+        topic: Dictionary with the document's title, filename and content
+        documents_directory: Directory where documents are stored
+        
+    Returns:
+        Path to the created document
+    """
+    # Derive both paths and the document id from one split of the filename
+    stem = os.path.splitext(topic["filename"])[0]
+    filepath = os.path.join(documents_directory, topic["filename"])
+    metadata_path = os.path.join(documents_directory, f"{stem}.json")
+    
+    # Create text file
+    with open(filepath, 'wb') as f:
+        f.write(topic["content"].encode('utf-8'))
+    
+    # Create metadata file
+    metadata = {
+        "title": topic["title"],
+        "source": "Tax Law Knowledge Base",
+        "document_id": stem,
+        "publication_date": "2023-03-15",
+        "jurisdiction": "Federal",
+        "document_type": "Tax Guide",
+        "tags": ["tax deduction", topic["title"].lower().replace(" ", "_")],
+        "url": None
+    }
+    
+    _write_json(metadata_path, metadata)
+    
+    logger.info(f"Created sample document: {filepath}")
+    return filepath
+
 
 class TaxLawDataCollector:
     """Collects tax law documents from various sources."""
@@ -47,6 +202,54 @@ class TaxLawDataCollector:
             year: Tax year of the publication (e.g., "2023")
             save_as_txt: Whether to create a text version alongside the PDF
             
+        Returns:
+            Path to the downloaded file, or None if download failed
+        """
+        return asyncio.run(self._download_publications([(publication_number, year)], save_as_txt))[0]
+    
+    async def _download_publications(
+        self,
+        publications: List[Tuple[str, str]],
+        save_as_txt: bool
+    ) -> List[Optional[str]]:
+        """
+        Download several IRS publications concurrently over one connection pool.
+        
+        Args:
+            publications: (publication number, year) pairs
+            save_as_txt: Whether to create a text version alongside each PDF
+            
+        Returns:
+            Path to each downloaded file, or None where the download failed,
+            in the order given
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+        limits = httpx.Limits(max_connections=5, max_keepalive_connections=5, keepalive_expiry=30)
+        
+        async with httpx.AsyncClient(limits=limits, timeout=30.0, follow_redirects=True) as client:
+            return await asyncio.gather(*(
+                self._download_publication(client, semaphore, number, year, save_as_txt)
+                for number, year in publications
+            ))
+    
+    async def _download_publication(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        publication_number: str,
+        year: str,
+        save_as_txt: bool
+    ) -> Optional[str]:
+        """
+        Download one IRS publication, streaming it to disk.
+        
+        Args:
+            client: Shared HTTP client
+            semaphore: Limits how many publications are fetched at once
+            publication_number: IRS publication number (e.g., "535")
+            year: Tax year of the publication (e.g., "2023")
+            save_as_txt: Whether to create a text version alongside the PDF
+            
         Returns:
             Path to the downloaded file, or None if download failed
         """
@@ -58,41 +261,58 @@ class TaxLawDataCollector:
             filename = f"irs_pub_{publication_number}_{year}.pdf"
             filepath = os.path.join(self.documents_directory, filename)
             
-            logger.info(f"Downloading IRS Publication {publication_number} from {url}")
+            # Revalidate a previous download instead of fetching it again
+            validators_path = f"{filepath}.etag"
+            headers = {}
+            if os.path.exists(filepath) and os.path.exists(validators_path):
+                with open(validators_path, 'r', encoding='utf-8') as f:
+                    validators = json.load(f)
+                if validators.get("etag"):
+                    headers["If-None-Match"] = validators["etag"]
+                if validators.get("last_modified"):
+                    headers["If-Modified-Since"] = validators["last_modified"]
             
-            # Download the file
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            
-            # Save the file
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            logger.info(f"Successfully downloaded to {filepath}")
+            async with semaphore:
+                logger.info(f"Downloading IRS Publication {publication_number} from {url}")
+                
+                # Download the file
+                async with client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304:
+                        logger.info(f"IRS Publication {publication_number} not modified, using {filepath}")
+                    else:
+                        response.raise_for_status()
+                        
+                        # Drop stale validators first so an interrupted download
+                        # is never revalidated as complete
+                        if os.path.exists(validators_path):
+                            os.remove(validators_path)
+                        
+                        # Save the file, writing each chunk on a worker thread while
+                        # the next one is received; awaiting the previous write
+                        # before starting another keeps the chunks in order
+                        loop = asyncio.get_running_loop()
+                        with open(filepath, 'wb') as f:
+                            pending_write = None
+                            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                                if pending_write is not None:
+                                    await pending_write
+                                pending_write = loop.run_in_executor(None, f.write, chunk)
+                            if pending_write is not None:
+                                await pending_write
+                        
+                        # Keep the validators for the next conditional GET
+                        validators = {
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified")
+                        }
+                        if any(validators.values()):
+                            _write_json(validators_path, validators)
+                        
+                        logger.info(f"Successfully downloaded to {filepath}")
             
             # Create a simplified text version with metadata if requested
             if save_as_txt:
-                txt_filename = f"irs_pub_{publication_number}_{year}.txt"
-                txt_filepath = os.path.join(self.documents_directory, txt_filename)
-                
-                # Create a simple text file with metadata
-                with open(txt_filepath, 'w', encoding='utf-8') as f:
-                    f.write(f"IRS Publication {publication_number} ({year})\n\n")
-                    f.write(f"Title: IRS Publication {publication_number}\n")
-                    f.write(f"Year: {year}\n")
-                    f.write(f"Source: Internal Revenue Service\n")
-                    f.write(f"URL: {url}\n\n")
-                    
-                    # Add some sample content based on the publication number
-                    f.write(self._get_sample_content(publication_number))
-                
-                logger.info(f"Created simplified text version at {txt_filepath}")
-                
-                # Also create a JSON file with metadata
-                self._create_metadata_file(publication_number, year, url)
-                
-                return txt_filepath
+                return self._create_text_version(publication_number, year, url)
             
             return filepath
             
@@ -100,6 +320,40 @@ class TaxLawDataCollector:
             logger.error(f"Error downloading IRS Publication {publication_number}: {str(e)}")
             return None
     
+    def _create_text_version(self, publication_number: str, year: str, url: str) -> str:
+        """
+        Create the simplified text version and metadata file for a publication.
+        
+        Args:
+            publication_number: IRS publication number
+            year: Tax year
+            url: Source URL
+            
+        Returns:
+            Path to the text file
+        """
+        txt_filename = f"irs_pub_{publication_number}_{year}.txt"
+        txt_filepath = os.path.join(self.documents_directory, txt_filename)
+        
+        # Create a simple text file with metadata, followed by some sample
+        # content based on the publication number, encoded and written at once
+        header = (
+            f"IRS Publication {publication_number} ({year})\n\n"
+            f"Title: IRS Publication {publication_number}\n"
+            f"Year: {year}\n"
+            f"Source: Internal Revenue Service\n"
+            f"URL: {url}\n\n"
+        )
+        with open(txt_filepath, 'wb') as f:
+            f.write((header + self._get_sample_content(publication_number)).encode('utf-8'))
+        
+        logger.info(f"Created simplified text version at {txt_filepath}")
+        
+        # Also create a JSON file with metadata
+        self._create_metadata_file(publication_number, year, url)
+        
+        return txt_filepath
+    
     def _create_metadata_file(self, publication_number: str, year: str, url: str) -> None:
         """
         Create a metadata JSON file for the publication.
@@ -132,8 +386,7 @@ class TaxLawDataCollector:
         json_filename = f"irs_pub_{publication_number}_{year}.json"
         json_filepath = os.path.join(self.documents_directory, json_filename)
         
-        with open(json_filepath, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
+        _write_json(json_filepath, metadata)
         
         logger.info(f"Created metadata file at {json_filepath}")
     
@@ -147,87 +400,7 @@ class TaxLawDataCollector:
         Returns:
             Sample content text
         """
-        # Dictionary of sample content for common IRS publications
-        sample_content = {
-            "535": """
-## Business Expenses
-
-### Introduction
-This publication discusses common business expenses and explains what is and is not deductible.
-
-### What's New
-For tax years beginning in 2023, the maximum section 179 expense deduction is $1,160,000.
-This limit is reduced by the amount by which the cost of section 179 property placed in
-service during the tax year exceeds $2,890,000.
-
-### Deducting Business Expenses
-To be deductible, a business expense must be both ordinary and necessary. An ordinary expense
-is one that is common and accepted in your trade or business. A necessary expense is one that
-is helpful and appropriate for your trade or business.
-
-### Business Use of Your Home
-If you use part of your home for business, you may be able to deduct expenses for the business
-use of your home. These expenses may include mortgage interest, insurance, utilities, repairs,
-and depreciation.
-
-### Car and Truck Expenses
-If you use your car or truck in your business, you may be able to deduct the costs of operating
-and maintaining your vehicle. You can either deduct the actual expenses or use the standard
-mileage rate.
-""",
-            "17": """
-## Your Federal Income Tax For Individuals
-
-### Introduction
-This publication covers the general rules for filing a federal income tax return.
-
-### What's New
-For 2023, the standard deduction has increased to $13,850 for single filers and $27,700 for
-married couples filing jointly.
-
-### Filing Requirements
-You must file a federal income tax return if your income is above a certain level, which varies
-depending on your filing status, age, and the type of income you received.
-
-### Filing Status
-Your filing status is used to determine your filing requirements, standard deduction, eligibility
-for certain credits, and your correct tax. There are five filing statuses: Single, Married Filing
-Jointly, Married Filing Separately, Head of Household, and Qualifying Surviving Spouse.
-
-### Dependents
-You can claim a dependent on your tax return if they meet certain tests. This can affect your
-eligibility for certain tax benefits.
-""",
-            "225": """
-## Farmer's Tax Guide
-
-### Introduction
-This publication explains how the federal tax laws apply to farming.
-
-### What's New
-For 2023, the maximum amount you can elect to deduct for most section 179 property you placed
-in service in 2023 is $1,160,000.
-
-### Farm Income
-You must include various types of income on your tax return, including income from the sale of
-livestock, produce, grains, and other products you raised.
-
-### Farm Business Expenses
-The ordinary and necessary costs of operating a farm for profit are deductible business expenses.
-These include the costs of feed, seed, fertilizer, and similar farm supplies.
-
-### Depreciation, Section 179 Deduction, and Special Depreciation Allowance
-If you buy farm property such as machinery, equipment, or structures that have a useful life of
-more than a year, you generally cannot deduct the entire cost in the year you buy it. Instead,
-you must depreciate these assets.
-"""
-        }
-        
-        # Return sample content or a default message
-        return sample_content.get(
-            publication_number,
-            f"Sample content for IRS Publication {publication_number}. This is placeholder text for demonstration purposes."
-        )
+        return _SAMPLE_CONTENT.get(publication_number) or _DEFAULT_SAMPLE_CONTENT.format(publication_number)
     
     def download_common_irs_publications(self) -> List[str]:
         """
@@ -245,25 +418,16 @@ you must depreciate these assets.
             {"number": "463", "year": "2023", "title": "Travel, Gift, and Car Expenses"},
         ]
         
-        downloaded_files = []
-        
         for pub in publications:
             logger.info(f"Processing IRS Publication {pub['number']}: {pub['title']}")
-            
-            # Try to download as PDF, fallback to creating text version
-            result = self.download_irs_publication(
-                publication_number=pub["number"],
-                year=pub["year"],
-                save_as_txt=True
-            )
-            
-            if result:
-                downloaded_files.append(result)
-            
-            # Sleep to avoid overwhelming the server
-            time.sleep(1)
         
-        return downloaded_files
+        # Download concurrently, with at most MAX_CONCURRENT_DOWNLOADS in flight
+        results = asyncio.run(self._download_publications(
+            [(pub["number"], pub["year"]) for pub in publications],
+            save_as_txt=True
+        ))
+        
+        return [result for result in results if result]
     
     def create_sample_tax_law_documents(self) -> List[str]:
         """
@@ -272,8 +436,6 @@ you must depreciate these assets.
         Returns:
             List of created document paths
         """
-        created_files = []
-        
         # Create sample documents for different tax topics
         tax_topics = [
             {
@@ -374,34 +536,12 @@ Using the home office deduction may affect the tax treatment when you sell your
             }
         ]
         
-        for topic in tax_topics:
-            filepath = os.path.join(self.documents_directory, topic["filename"])
-            
-            # Create text file
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(topic["content"])
-            
-            # Create metadata file
-            metadata_path = os.path.join(
-                self.documents_directory, 
-                os.path.splitext(topic["filename"])[0] + ".json"
-            )
-            
-            metadata = {
-                "title": topic["title"],
-                "source": "Tax Law Knowledge Base",
-                "document_id": os.path.splitext(topic["filename"])[0],
-                "publication_date": "2023-03-15",
-                "jurisdiction": "Federal",
-                "document_type": "Tax Guide",
-                "tags": ["tax deduction", topic["title"].lower().replace(" ", "_")],
-                "url": None
-            }
-            
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2)
-            
-            created_files.append(filepath)
-            logger.info(f"Created sample document: {filepath}")
+        # Write the documents concurrently; each is an independent pair of files
+        with ThreadPoolExecutor(max_workers=SAMPLE_WRITE_WORKERS) as executor:
+            futures = [
+                executor.submit(_write_topic, topic, self.documents_directory)
+                for topic in tax_topics
+            ]
+            created_files = [future.result() for future in futures]
         
         return created_files
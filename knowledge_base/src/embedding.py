@@ -5,6 +5,7 @@ This module provides functionality to convert text documents into vector embeddi
 from typing import List, Union, Dict, Any
 import os
 import logging
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
 
@@ -49,7 +50,28 @@ class EmbeddingGenerator:
         Returns:
             A list of embeddings, where each embedding is a list of floats
         """
-        return [self.model.encode(text).tolist() for text in texts]
+        return self.model.encode(texts).tolist()
+
+    def generate_embedding_array(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts as one float32 array.
+        
+        Unlike generate_embeddings, this keeps the embeddings in a contiguous
+        NumPy buffer that can be passed to ChromaDB without building Python lists.
+        
+        Args:
+            texts: List of text contents to embed
+            batch_size: Number of texts per forward pass
+            
+        Returns:
+            A float32 array with one embedding per row
+        """
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).astype(np.float32, copy=False)
 
     def chunk_document(self, document: str, chunk_size: int = 512, overlap: int = 50) -> List[str]:
         """
@@ -109,7 +109,8 @@ class TaxLawKnowledgeBase:
         self, 
         query: str, 
         n_results: int = 5,
-        filter_criteria: Optional[Dict[str, Any]] = None
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> Dict[str, Any]:
         """
         Search for documents related to a query.
@@ -118,12 +119,34 @@ class TaxLawKnowledgeBase:
             query: The search query
             n_results: Number of results to return
             filter_criteria: Optional filter to apply to the search
+            query_embedding: Precomputed embedding of the query, if available
             
         Returns:
             Dictionary containing search results
         """
         logger.info(f"Searching for: {query}")
-        return self.vector_store.search(query, n_results, filter_criteria)
+        return self.vector_store.search(query, n_results, filter_criteria, query_embedding)
+    
+    def search_batch(
+        self, 
+        queries: List[str], 
+        n_results: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Search for documents related to each of several queries at once.
+        
+        Args:
+            queries: The search queries
+            n_results: Number of results to return per query
+            filter_criteria: Optional filter to apply to the search
+            
+        Returns:
+            Dictionary containing search results, with one entry per query in
+            each result list
+        """
+        logger.info(f"Searching for {len(queries)} queries")
+        return self.vector_store.search_batch(queries, n_results, filter_criteria)
     
     def get_document(self, document_id: str) -> List[Dict[str, Any]]:
         """
@@ -5,6 +5,7 @@ This module provides functionality to store and retrieve tax law document embedd
 import os
 import logging
 from typing import List, Dict, Any, Optional, Union
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
@@ -73,7 +74,8 @@ class TaxLawVectorStore:
         text: str, 
         metadata: TaxLawMetadata,
         chunk_size: int = 512,
-        chunk_overlap: int = 50
+        chunk_overlap: int = 50,
+        embeddings: Optional[np.ndarray] = None
     ) -> List[str]:
         """
         Add a document to the vector store.
@@ -84,6 +86,8 @@ class TaxLawVectorStore:
             metadata: Metadata for the document
             chunk_size: Size of text chunks for embedding
             chunk_overlap: Overlap between chunks
+            embeddings: Precomputed float32 embeddings, one row per chunk
+                produced with the same chunk_size and chunk_overlap
             
         Returns:
             List of IDs for the chunks added to the collection
@@ -101,8 +105,14 @@ class TaxLawVectorStore:
         # Generate chunk IDs
         chunk_ids = [f"{document_id}_chunk_{i}" for i in range(len(chunks))]
         
-        # Generate embeddings for each chunk
-        embeddings = self.embedding_generator.generate_embeddings(chunks)
+        # Generate embeddings for all chunks as one float32 array, which ChromaDB
+        # takes as-is instead of nested lists of Python floats
+        if embeddings is None:
+            embeddings = self.embedding_generator.generate_embedding_array(chunks)
+        elif len(embeddings) != len(chunks):
+            raise ValueError(
+                f"Got {len(embeddings)} embeddings for {len(chunks)} chunks of document {document_id}"
+            )
         
         # Convert metadata to dictionary and add chunk information
         metadata_dict = metadata.to_dict()
@@ -131,7 +141,8 @@ class TaxLawVectorStore:
         self, 
         query: str, 
         n_results: int = 5,
-        filter_criteria: Optional[Dict[str, Any]] = None
+        filter_criteria: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> Dict[str, Any]:
         """
         Search for documents similar to the query.
@@ -140,12 +151,14 @@ class TaxLawVectorStore:
             query: The search query
             n_results: Number of results to return
             filter_criteria: Optional filter to apply to the search
+            query_embedding: Precomputed embedding of the query, if available
             
         Returns:
             Dictionary containing search results
         """
-        # Generate embedding for the query
-        query_embedding = self.embedding_generator.generate_embedding(query)
+        # Generate embedding for the query unless the caller already has it
+        if query_embedding is None:
+            query_embedding = self.embedding_generator.generate_embedding(query)
         
         # Perform the search
         results = self.collection.query(
@@ -156,6 +169,35 @@ class TaxLawVectorStore:
         
         return results
     
+    def search_batch(
+        self, 
+        queries: List[str], 
+        n_results: int = 5,
+        filter_criteria: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Search for documents similar to each of several queries at once.
+        
+        The queries are embedded in one model call and sent to ChromaDB as a
+        single batched query.
+        
+        Args:
+            queries: The search queries
+            n_results: Number of results to return per query
+            filter_criteria: Optional filter to apply to the search
+            
+        Returns:
+            Dictionary containing search results, with one entry per query in
+            each result list
+        """
+        query_embeddings = self.embedding_generator.generate_embeddings(queries)
+        
+        return self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=filter_criteria
+        )
+    
     def get_document(self, document_id: str) -> List[Dict[str, Any]]:
         """
         Retrieve all chunks for a specific document ID.
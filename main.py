@@ -5,10 +5,13 @@ This serves as the API entry point for processing tax law queries.
 
 import os
 import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 
 # Import centralized configuration
-from config import API_HOST, API_PORT, DEBUG, USE_MISTRAL, CURRENT_MODEL
+from config import API_HOST, API_PORT, DEBUG, USE_MISTRAL, CURRENT_MODEL, GENERATION_BATCH_SIZE
 
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
@@ -18,6 +21,8 @@ from ai_engine.model_loader import model_loader
 from ai_engine.query_processor import process_tax_query, preprocess_query
 from ai_engine.validation import validate_query, validate_ai_response
 
+# Configure logging once for the whole application; ai_engine modules only call getLogger
+logging.basicConfig(level=logging.INFO)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -40,6 +45,10 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization"],
 )
 
+# Worker threads for blocking query processing (retrieval and generation), sized so
+# a full generation batch can be in flight while the event loop keeps serving requests
+_query_executor = ThreadPoolExecutor(max_workers=max(4, GENERATION_BATCH_SIZE), thread_name_prefix="query")
+
 # Request and response models
 class QueryRequest(BaseModel):
     query: str
@@ -97,7 +106,9 @@ async def query_endpoint(request: QueryRequest):
         start_time = time.time()
         
         # Process the query
-        result = process_tax_query(request.query, request.context)
+        result = await asyncio.get_running_loop().run_in_executor(
+            _query_executor, process_tax_query, request.query, request.context
+        )
         
         # Validate the AI response
         is_valid_response, response_error = validate_ai_response(result)
@@ -7,13 +7,31 @@ for storing and retrieving tax law documents as vector embeddings.
 
 import os
 import logging
+import threading
 from typing import List, Dict, Any, Optional, Union
 import chromadb
 from chromadb.utils import embedding_functions
 from sentence_transformers import SentenceTransformer
 
+try:
+    import numpy as np
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Above this many documents, searches go through a FAISS IVF index with
+# fast-scan PQ codes instead of ChromaDB's HNSW graph. Fast-scan packs 4-bit
+# PQ codes so distance lookup tables stay in SIMD registers, which makes
+# scanning the probed inverted lists much cheaper than standard IVF-PQ.
+IVF_MIN_DOCUMENTS = 100_000
+IVF_INDEX_FACTORY = "IVF1024,PQ32x4fs"
+IVF_NPROBE = 16
+# Enough vectors for k-means over 1024 centroids without training on everything
+IVF_TRAINING_SAMPLE = 1024 * 64
+
 
 class TaxLawRAG:
     """
@@ -23,7 +41,9 @@ class TaxLawRAG:
     def __init__(self, 
                  db_path: str = "./data/tax_law_db", 
                  collection_name: str = "tax_laws",
-                 embedding_model_name: str = "all-MiniLM-L6-v2"):
+                 embedding_model_name: str = "all-MiniLM-L6-v2",
+                 ivf_min_documents: int = IVF_MIN_DOCUMENTS,
+                 ivf_nprobe: int = IVF_NPROBE):
         """
         Initialize the RAG system with ChromaDB and embedding model.
         
@@ -31,9 +51,19 @@ class TaxLawRAG:
             db_path: Path to store the ChromaDB database
             collection_name: Name of the collection in ChromaDB
             embedding_model_name: Name of the sentence transformer model for embeddings
+            ivf_min_documents: Collection size at which search switches to a FAISS IVF-PQ index
+            ivf_nprobe: Number of inverted lists probed per FAISS search (recall vs. latency)
         """
         self.db_path = db_path
         self.collection_name = collection_name
+        self.ivf_min_documents = ivf_min_documents
+        self.ivf_nprobe = ivf_nprobe
+        
+        # FAISS index over the collection's embeddings, rebuilt lazily after changes
+        self._ivf_index = None
+        self._ivf_ids: List[str] = []
+        self._ivf_stale = True
+        self._ivf_lock = threading.Lock()
         
         # Ensure the database directory exists
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -79,6 +109,7 @@ class TaxLawRAG:
             metadatas=[metadata]
         )
         
+        self._ivf_stale = True
         logger.info(f"Indexed document: {doc_id}")
     
     def index_documents(self, documents: List[Dict[str, Any]]) -> None:
@@ -109,6 +140,7 @@ class TaxLawRAG:
             metadatas=metadatas
         )
         
+        self._ivf_stale = True
         logger.info(f"Indexed {len(documents)} documents")
     
     def search(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
@@ -122,6 +154,10 @@ class TaxLawRAG:
         Returns:
             List of relevant documents with their content and metadata
         """
+        ivf_index = self._get_ivf_index()
+        if ivf_index is not None:
+            return self._ivf_search(ivf_index, query, n_results)
+        
         results = self.collection.query(
             query_texts=[query],
             n_results=n_results
@@ -143,6 +179,108 @@ class TaxLawRAG:
         
         return formatted_results
     
+    def _get_ivf_index(self):
+        """
+        Get the FAISS IVF index, building it if the collection has grown past the threshold.
+        
+        Returns:
+            The trained FAISS index, or None to search through ChromaDB
+        """
+        if not FAISS_AVAILABLE:
+            return None
+        
+        if self._ivf_needs_rebuild(self.collection.count()):
+            with self._ivf_lock:
+                count = self.collection.count()
+                if self._ivf_needs_rebuild(count):
+                    if count >= self.ivf_min_documents:
+                        self._build_ivf_index()
+                    else:
+                        self._ivf_index = None
+                        self._ivf_ids = []
+                    self._ivf_stale = False
+        
+        return self._ivf_index
+    
+    def _ivf_needs_rebuild(self, count: int) -> bool:
+        """
+        Check whether the FAISS index no longer matches the collection.
+        
+        Other processes or TaxLawRAG instances on the same database change the
+        collection without marking this instance's index stale, so its size is
+        compared with what was indexed.
+        
+        Args:
+            count: Current number of documents in the collection
+            
+        Returns:
+            True if the index must be rebuilt (or dropped) before searching
+        """
+        if self._ivf_stale:
+            return True
+        if self._ivf_index is None:
+            return count >= self.ivf_min_documents
+        return count != len(self._ivf_ids)
+    
+    def _build_ivf_index(self) -> None:
+        """
+        Train a FAISS IVF-PQ fast-scan index on the collection's embeddings.
+        """
+        stored = self.collection.get(include=["embeddings"])
+        embeddings = np.asarray(stored["embeddings"], dtype="float32")
+        # L2-normalized vectors make inner product equal to cosine similarity
+        faiss.normalize_L2(embeddings)
+        
+        index = faiss.index_factory(embeddings.shape[1], IVF_INDEX_FACTORY, faiss.METRIC_INNER_PRODUCT)
+        if len(embeddings) > IVF_TRAINING_SAMPLE:
+            sample = np.random.default_rng(0).choice(len(embeddings), IVF_TRAINING_SAMPLE, replace=False)
+            index.train(embeddings[sample])
+        else:
+            index.train(embeddings)
+        index.add(embeddings)
+        faiss.extract_index_ivf(index).nprobe = self.ivf_nprobe
+        
+        self._ivf_index = index
+        self._ivf_ids = stored["ids"]
+        logger.info(f"Built FAISS {IVF_INDEX_FACTORY} index over {len(self._ivf_ids)} documents")
+    
+    def _ivf_search(self, index, query: str, n_results: int) -> List[Dict[str, Any]]:
+        """
+        Search the FAISS IVF index and fetch the matching documents from ChromaDB.
+        
+        Args:
+            index: The trained FAISS index
+            query: The search query
+            n_results: Number of results to return
+            
+        Returns:
+            List of relevant documents with their content and metadata
+        """
+        query_embedding = self.embedding_model.encode([query], normalize_embeddings=True)
+        scores, positions = index.search(np.asarray(query_embedding, dtype="float32"), n_results)
+        
+        # FAISS pads missing results with -1
+        hits = [(self._ivf_ids[pos], float(score)) for pos, score in zip(positions[0], scores[0]) if pos >= 0]
+        if not hits:
+            return []
+        
+        stored = self.collection.get(ids=[doc_id for doc_id, _ in hits], include=["documents", "metadatas"])
+        by_id = {
+            doc_id: (stored['documents'][i], stored['metadatas'][i])
+            for i, doc_id in enumerate(stored['ids'])
+        }
+        
+        return [
+            {
+                'id': doc_id,
+                'content': by_id[doc_id][0],
+                'metadata': by_id[doc_id][1],
+                'distance': 1.0 - score  # Cosine distance
+            }
+            for doc_id, score in hits
+            if doc_id in by_id
+        ]
+    
     def hybrid_search(self, query: str, n_results: int = 3, 
                      keyword_weight: float = 0.3, vector_weight: float = 0.7) -> List[Dict[str, Any]]:
         """
@@ -197,6 +335,7 @@ class TaxLawRAG:
             doc_id: The ID of the document to delete
         """
         self.collection.delete(ids=[doc_id])
+        self._ivf_stale = True
         logger.info(f"Deleted document: {doc_id}")
     
     def clear_collection(self) -> None:
@@ -204,6 +343,7 @@ class TaxLawRAG:
         Delete all documents from the collection.
         """
         self.collection.delete()
+        self._ivf_stale = True
         logger.info(f"Cleared all documents from collection: {self.collection_name}")
 
 
@@ -9,7 +9,6 @@ import logging
 from rag.rag_system import TaxLawRAG
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Sample tax law documents
@@ -161,6 +160,7 @@ def load_sample_data(rag_system=None):
 
 # Allow running this module directly
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     logger.info("Loading sample tax law documents into RAG system")
     rag = load_sample_data()
     
@@ -4,6 +4,7 @@ setup(
     name="taxai",
     version="0.1.0",
     packages=find_packages(),
+    py_modules=["config"],
     install_requires=[
         "fastapi>=0.105.0",
         "uvicorn>=0.23.2",
@@ -8,12 +8,14 @@ import unittest
 from unittest.mock import patch, MagicMock
 import time
 import json
+import threading
 
 # Add the project root to the path so we can import modules properly
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ai_engine.caching import QueryCache
+from ai_engine.caching import QueryCache, SemanticCache, NUMPY_AVAILABLE
 from ai_engine.query_processor import process_tax_query
+from ai_engine import retrieval
 
 
 class TestQueryCache(unittest.TestCase):
@@ -44,6 +46,16 @@ class TestQueryCache(unittest.TestCase):
         key4 = self.cache._generate_cache_key("What are the tax deductions?", "Different context")
         self.assertNotEqual(key1, key4)
     
+    def test_cache_key_list_context(self):
+        """Test that list contexts give order-independent keys without being mutated."""
+        context = ["Section 179", "IRS Publication 535"]
+        
+        key1 = self.cache._generate_cache_key("What are the tax deductions?", context)
+        key2 = self.cache._generate_cache_key("What are the tax deductions?", list(reversed(context)))
+        
+        self.assertEqual(key1, key2)
+        self.assertEqual(context, ["Section 179", "IRS Publication 535"])
+    
     def test_cache_set_and_get(self):
         """Test setting and retrieving cached responses."""
         # Create a sample response
@@ -92,6 +104,94 @@ class TestQueryCache(unittest.TestCase):
         # Verify the response is no longer cached
         self.assertIsNone(self.cache.get(sample_query))
     
+    def test_cache_get_many_and_set_many(self):
+        """Test batch caching and retrieval of several responses."""
+        items = [
+            ("What is the corporate tax rate?", {"response": "21%"}, None),
+            ("What is Section 179?", {"response": "Equipment expensing."}, "Sample context")
+        ]
+        
+        self.cache.set_many(items)
+        
+        results = self.cache.get_many([
+            ("What is Section 179?", "Sample context"),
+            ("An uncached query", None),
+            ("What is the corporate tax rate?", None)
+        ])
+        
+        self.assertEqual(results[0], {"response": "Equipment expensing."})
+        self.assertIsNone(results[1])
+        self.assertEqual(results[2], {"response": "21%"})
+    
+    def test_concurrent_misses_are_coalesced(self):
+        """Test that concurrent callers wait for an in-flight query instead of recomputing it."""
+        sample_query = "What is the mileage deduction rate?"
+        sample_response = {"response": "The standard mileage rate is 65.5 cents per mile."}
+        
+        # The first caller misses and becomes responsible for computing the response
+        self.assertIsNone(self.cache.get_or_claim(sample_query))
+        
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(self.cache.get_or_claim(sample_query)))
+        waiter.start()
+        time.sleep(0.1)
+        
+        self.cache.set(sample_query, sample_response)
+        waiter.join(timeout=5)
+        
+        self.assertEqual(results, [sample_response])
+    
+    def test_get_does_not_claim_or_wait(self):
+        """Test that plain get() misses never claim a key or block on a claimed one."""
+        sample_query = "What is the mileage deduction rate?"
+        
+        self.assertIsNone(self.cache.get(sample_query))
+        self.assertEqual(self.cache._inflight, {})
+        
+        # Another caller's claim does not make get() wait for it
+        self.assertIsNone(self.cache.get_or_claim(sample_query))
+        results = []
+        reader = threading.Thread(target=lambda: results.append(self.cache.get(sample_query)))
+        start = time.monotonic()
+        reader.start()
+        reader.join(timeout=5)
+        
+        self.assertEqual(results, [None])
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.cache.release(sample_query)
+
+    def test_abandoned_inflight_claim_is_dropped(self):
+        """Test that a claim whose owner never finishes stops blocking later misses."""
+        cache = QueryCache(use_redis=False, inflight_wait=0.2)
+        sample_query = "What is the home office deduction?"
+        
+        # Claim the key and never set or release it
+        self.assertIsNone(cache.get_or_claim(sample_query))
+        
+        waiter = threading.Thread(target=cache.get_or_claim, args=(sample_query,))
+        waiter.start()
+        waiter.join(timeout=5)
+        
+        # The timed-out waiter dropped the stale claim, so the next miss claims
+        # the key immediately instead of waiting again
+        self.assertNotIn(cache._generate_cache_key(sample_query), cache._inflight)
+
+    def test_redis_relayed_wakeup_expires(self):
+        """Test that a waiter relaying the wake-up token gives it an expiry."""
+        redis_cache = QueryCache(use_redis=False)
+        redis_cache.use_redis = True
+        redis_cache.redis = MagicMock()
+        redis_cache.redis.set.return_value = False
+        redis_cache.redis.blpop.return_value = (b"notify", b"1")
+        redis_cache.redis.get.return_value = None
+        pipe = redis_cache.redis.pipeline.return_value
+        
+        redis_cache._wait_for_inflight(redis_cache._generate_cache_key("What is Form 8829?"))
+        
+        redis_cache.redis.lpush.assert_not_called()
+        pipe.lpush.assert_called_once()
+        pipe.expire.assert_called_once()
+
     def test_cache_ttl(self):
         """Test Time-To-Live functionality for cache entries."""
         # Create a cache with a very short TTL
@@ -114,15 +214,111 @@ class TestQueryCache(unittest.TestCase):
         # Wait for the TTL to expire
         time.sleep(1.1)
         
-        # In a real Redis cache, the entry would be automatically expired
-        # For our in-memory test cache, we simulate this behavior
-        # In production with Redis, this test would work as expected
+        # The in-memory cache honours TTL just like Redis would
+        self.assertIsNone(short_ttl_cache.get(sample_query))
+    
+    def test_memory_cache_lru_eviction(self):
+        """Test that the in-memory cache evicts the least recently used entry."""
+        small_cache = QueryCache(use_redis=False, memory_cache_maxsize=2)
+        
+        small_cache.set("query one", {"response": "one"})
+        small_cache.set("query two", {"response": "two"})
+        
+        # Touch the first entry so the second becomes least recently used
+        self.assertIsNotNone(small_cache.get("query one"))
+        
+        small_cache.set("query three", {"response": "three"})
         
-        # We're testing the concept here, even though our in-memory cache doesn't
-        # automatically expire entries
-        pass
+        self.assertEqual(len(small_cache.memory_cache), 2)
+        self.assertIsNotNone(small_cache.get("query one"))
+        self.assertIsNone(small_cache.get("query two"))
+        self.assertIsNotNone(small_cache.get("query three"))
 
+    def test_redis_clear_all_uses_scan_and_pipelined_unlink(self):
+        """Test that clearing a Redis cache avoids KEYS and batches UNLINKs."""
+        redis_cache = QueryCache(use_redis=False)
+        redis_cache.use_redis = True
+        redis_cache.redis = MagicMock()
+        redis_cache.redis.scan_iter.return_value = iter(
+            [f"taxai:query:{i}" for i in range(750)]
+        )
+        pipe = redis_cache.redis.pipeline.return_value
+        pipe.execute.side_effect = [[500], [250]]
+        
+        redis_cache.clear_all()
+        
+        redis_cache.redis.keys.assert_not_called()
+        redis_cache.redis.pipeline.assert_called_with(transaction=False)
+        self.assertEqual(pipe.unlink.call_count, 2)
+        self.assertEqual(len(pipe.unlink.call_args_list[0][0]), 500)
+        self.assertEqual(len(pipe.unlink.call_args_list[1][0]), 250)
+        redis_cache.redis.delete.assert_called_with("taxai:stats:query_count")
 
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy is required for the semantic cache")
+class TestSemanticCache(unittest.TestCase):
+    """Tests for the embedding-based semantic cache."""
+    
+    def setUp(self):
+        """Set up a small semantic cache for each test."""
+        self.cache = SemanticCache(threshold=0.95, maxsize=2)
+        self.response = {"query": "What is the standard deduction?", "response": "It is $13,850."}
+    
+    def test_similar_query_hits(self):
+        """Test that a nearby embedding returns the cached response."""
+        self.cache.set([1.0, 0.0, 0.0], self.response, "no_context")
+        
+        self.assertEqual(self.cache.get([0.99, 0.05, 0.0], "no_context"), self.response)
+        self.assertIsNone(self.cache.get([0.5, 0.5, 0.0], "no_context"))
+    
+    def test_context_must_match(self):
+        """Test that responses are only reused for the same context."""
+        self.cache.set([1.0, 0.0, 0.0], self.response, ["ref b", "ref a"])
+        
+        self.assertEqual(self.cache.get([1.0, 0.0, 0.0], ["ref a", "ref b"]), self.response)
+        self.assertIsNone(self.cache.get([1.0, 0.0, 0.0], "no_context"))
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        self.cache.set([1.0, 0.0, 0.0], {"response": "a"})
+        self.cache.set([0.0, 1.0, 0.0], {"response": "b"})
+        
+        # Touch "a" so "b" becomes the eviction candidate
+        self.cache.get([1.0, 0.0, 0.0])
+        self.cache.set([0.0, 0.0, 1.0], {"response": "c"})
+        
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get([1.0, 0.0, 0.0]), {"response": "a"})
+        self.assertIsNone(self.cache.get([0.0, 1.0, 0.0]))
+        self.assertEqual(self.cache.get([0.0, 0.0, 1.0]), {"response": "c"})
+
+
+class TestRetrievalMemo(unittest.TestCase):
+    """Tests for the memoized context retrieval."""
+    
+    def setUp(self):
+        """Start each test with an empty retrieval memo."""
+        retrieval._retrieve_context_cached.cache_clear()
+    
+    @patch('ai_engine.retrieval.retrieve_tax_laws')
+    def test_empty_results_are_not_memoized(self, mock_retrieve):
+        """Test that a query asked before indexing finds documents indexed later."""
+        document = {
+            "content": "The corporate tax rate is 21%.",
+            "metadata": {"title": "Tax imposed", "source": "IRC § 11", "year": "2023"}
+        }
+        mock_retrieve.side_effect = [[], [document]]
+        
+        self.assertEqual(retrieval.retrieve_context_for_query("corporate tax rate"), ())
+        context = retrieval.retrieve_context_for_query("corporate tax rate")
+        self.assertEqual(context, ("Tax imposed (IRC § 11, 2023): The corporate tax rate is 21%.",))
+        
+        # Non-empty results are memoized
+        self.assertEqual(retrieval.retrieve_context_for_query("corporate tax rate"), context)
+        self.assertEqual(mock_retrieve.call_count, 2)
+
+
+@patch('ai_engine.query_processor.semantic_cache', SemanticCache(enabled=False))
 class TestCacheIntegration(unittest.TestCase):
     """Tests for the cache integration with the query processor."""
     
@@ -138,13 +334,13 @@ class TestCacheIntegration(unittest.TestCase):
             "citations": ["IRC § 11"],
             "confidence_score": 0.95
         }
-        mock_cache.get.return_value = cached_response
+        mock_cache.get_or_claim.return_value = cached_response
         
         # Process a query
         result = process_tax_query("What is the corporate tax rate?")
         
         # Verify that the cached response was used
-        mock_cache.get.assert_called_once()
+        mock_cache.get_or_claim.assert_called_once()
         
         # Since the response was cached, generate_response should not be called
         mock_generate.assert_not_called()
@@ -158,7 +354,7 @@ class TestCacheIntegration(unittest.TestCase):
     def test_cache_miss(self, mock_retrieve, mock_generate, mock_cache):
         """Test that new responses are generated on cache miss."""
         # Set up the cache to miss
-        mock_cache.get.return_value = None
+        mock_cache.get_or_claim.return_value = None
         
         # Set up mock response generation
         mock_retrieve.return_value = ["Sample tax context"]
@@ -168,7 +364,7 @@ class TestCacheIntegration(unittest.TestCase):
         result = process_tax_query("What is the corporate tax rate?")
         
         # Verify that the cache was checked but missed
-        mock_cache.get.assert_called_once()
+        mock_cache.get_or_claim.assert_called_once()
         
         # Since the response was not cached, generate_response should be called
         mock_generate.assert_called_once()
@@ -182,6 +378,44 @@ class TestCacheIntegration(unittest.TestCase):
         self.assertIn("IRC § 11", result["citations"])
 
 
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy is required for the semantic cache")
+class TestSemanticCacheIntegration(unittest.TestCase):
+    """Tests for the semantic cache tier of the query processor."""
+    
+    @patch('ai_engine.query_processor.embed_query')
+    @patch('ai_engine.model_loader.model_loader.generate_response')
+    @patch('ai_engine.retrieval.retrieve_context_for_query')
+    def test_semantic_cache_hit(self, mock_retrieve, mock_generate, mock_embed):
+        """Test that the answer to a paraphrased query is reused without generation."""
+        test_cache = QueryCache(use_redis=False)
+        test_cache.clear_all()
+        test_semantic_cache = SemanticCache(threshold=0.95)
+        
+        cached_response = {
+            "query": "What is the corporate tax rate?",
+            "response": "The corporate tax rate is 21%.",
+            "citations": ["IRC § 11"],
+            "confidence_score": 0.95
+        }
+        test_semantic_cache.set([1.0, 0.0, 0.0], cached_response, "no_context")
+        mock_embed.return_value = [0.99, 0.05, 0.0]
+        mock_retrieve.return_value = []
+        
+        with patch('ai_engine.query_processor.query_cache', test_cache), \
+                patch('ai_engine.query_processor.semantic_cache', test_semantic_cache):
+            result = process_tax_query("What's the tax rate for corporations?")
+        
+        # The paraphrase is answered from the semantic cache
+        mock_embed.assert_called_once()
+        mock_generate.assert_not_called()
+        self.assertEqual(result["response"], cached_response["response"])
+        self.assertEqual(result["query"], "What's the tax rate for corporations?")
+        
+        # The reused answer is also stored under the exact key
+        self.assertIsNotNone(test_cache.get("What's the tax rate for corporations?", "no_context"))
+
+
+@patch('ai_engine.query_processor.semantic_cache', SemanticCache(enabled=False))
 class TestPerformanceWithCache(unittest.TestCase):
     """Tests for performance improvements with caching."""
     
@@ -0,0 +1,102 @@
+"""
+Unit tests for prompt tokenization in the API model manager.
+"""
+
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Add the project root to the path so we can import modules properly
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai import model_manager
+from core_ai_engine.prompt_engineering import TAX_QUERY_PROMPT_PREFIX, create_tax_query_prompt
+
+
+class _CharTokenizer:
+    """
+    Character-level stand-in for a tokenizer.
+    
+    With word_start_marker set it behaves like SentencePiece, which marks the
+    start of every text it encodes.
+    """
+    
+    BOS = 1
+    WORD_START = 2
+    
+    def __init__(self, word_start_marker=False):
+        self.word_start_marker = word_start_marker
+        self.bos_token_id = self.BOS
+    
+    def _encode(self, text, add_special_tokens):
+        ids = [self.BOS] if add_special_tokens else []
+        if self.word_start_marker:
+            ids.append(self.WORD_START)
+        return ids + [ord(char) for char in text]
+    
+    def __call__(self, text, add_special_tokens=True):
+        if isinstance(text, list):
+            return {"input_ids": [self._encode(t, add_special_tokens) for t in text]}
+        return {"input_ids": self._encode(text, add_special_tokens)}
+    
+    def pad(self, encoded, **kwargs):
+        return encoded
+
+
+class TestPromptTokenization(unittest.TestCase):
+    """Tests for reusing the cached prompt prefix token ids."""
+    
+    def setUp(self):
+        self.prompt = create_tax_query_prompt(
+            "Can I deduct my home office?",
+            [{"source": "IRS Publication 587", "content": "Business use of your home."}]
+        )
+    
+    def _prefix_ids(self, tokenizer):
+        return tokenizer(TAX_QUERY_PROMPT_PREFIX)["input_ids"]
+    
+    def test_prefix_reused_when_concatenation_matches(self):
+        """Test that the cached prefix is used when it tokenizes the same in context."""
+        tokenizer = _CharTokenizer()
+        prefix_ids = self._prefix_ids(tokenizer)
+        self.assertTrue(model_manager._prefix_concat_matches(tokenizer, prefix_ids))
+        
+        with patch.object(model_manager, "_prefix_ids", prefix_ids):
+            inputs = model_manager._tokenize_prompts(tokenizer, [self.prompt], None, None)
+        
+        self.assertEqual(inputs["input_ids"], [tokenizer(self.prompt)["input_ids"]])
+    
+    def test_full_tokenization_when_concatenation_differs(self):
+        """Test that SentencePiece-style tokenizers fall back to tokenizing whole prompts."""
+        tokenizer = _CharTokenizer(word_start_marker=True)
+        self.assertFalse(model_manager._prefix_concat_matches(tokenizer, self._prefix_ids(tokenizer)))
+        
+        with patch.object(model_manager, "_prefix_ids", None):
+            inputs = model_manager._tokenize_prompts(tokenizer, [self.prompt], None, None)
+        
+        self.assertEqual(inputs["input_ids"], [tokenizer(self.prompt)["input_ids"]])
+    
+    def test_truncation_keeps_instructions_and_question(self):
+        """Test that over-long prompts lose reference text rather than their head or question."""
+        tokenizer = _CharTokenizer()
+        prefix_ids = self._prefix_ids(tokenizer)
+        prompt = create_tax_query_prompt(
+            "Can I deduct my home office?",
+            [{"source": "IRS Publication 587", "content": "Business use of your home. " * 50}]
+        )
+        max_length = len(prefix_ids) + 300
+        
+        with patch.object(model_manager, "_prefix_ids", prefix_ids), \
+                patch.object(model_manager, "_prefix_len", len(prefix_ids)):
+            ids = model_manager._tokenize_prompts(tokenizer, [prompt], max_length, None)["input_ids"][0]
+        
+        full_ids = tokenizer(prompt)["input_ids"]
+        self.assertEqual(len(ids), max_length)
+        self.assertEqual(ids[:len(prefix_ids)], prefix_ids)
+        self.assertEqual(ids[len(prefix_ids):], full_ids[-300:])
+        self.assertTrue("".join(map(chr, ids[len(prefix_ids):])).endswith("USER QUESTION: Can I deduct my home office?\n\nANSWER:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,11 +15,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ai_engine.query_processor import (
     preprocess_query,
     format_tax_prompt,
+    format_tax_prompt_blocks,
     process_tax_query,
     extract_citations
 )
+from ai_engine.caching import SemanticCache
 
 
+@patch('ai_engine.query_processor.semantic_cache', SemanticCache(enabled=False))
 class TestQueryProcessor(unittest.TestCase):
     """Tests for the query processor functionality."""
     
@@ -87,6 +90,30 @@ class TestQueryProcessor(unittest.TestCase):
         assert isinstance(result["citations"], list)
 
 
+    def test_format_tax_prompt_blocks(self):
+        """Test that prompt blocks split at the cache breakpoints and join to the full prompt."""
+        context = ["IRC § 179 allows equipment expensing."]
+        blocks = format_tax_prompt_blocks("What is Section 179?", context)
+        
+        # System prompt, references, then the question
+        assert len(blocks) == 3
+        assert blocks[0]["cache_control"] == {"type": "ephemeral"}
+        assert "cache_control" not in blocks[1]
+        assert "IRC § 179" in blocks[1]["text"]
+        assert "What is Section 179?" in blocks[2]["text"]
+        
+        # The string prompt is exactly the concatenated blocks
+        assert format_tax_prompt("What is Section 179?", context) == "".join(b["text"] for b in blocks)
+    
+    def test_format_tax_prompt_blocks_keep_retrieval_order(self):
+        """Test that references are numbered in the order the retriever ranked them."""
+        context = ["Section 179 allows equipment expensing.", "IRS Publication 946 covers depreciation."]
+        blocks = format_tax_prompt_blocks("What is Section 179?", context)
+        
+        assert blocks[1]["text"].index("1. Section 179") < blocks[1]["text"].index("2. IRS Publication 946")
+
+
+@patch('ai_engine.query_processor.semantic_cache', SemanticCache(enabled=False))
 class TestPerformance(unittest.TestCase):
     """Performance tests for query processing."""
     
@@ -111,6 +138,7 @@ class TestPerformance(unittest.TestCase):
         assert processing_time < 0.5, f"Query processing took {processing_time:.2f}s, which exceeds the benchmark of 0.5s"
 
 
+@patch('ai_engine.query_processor.semantic_cache', SemanticCache(enabled=False))
 class TestEdgeCases(unittest.TestCase):
     """Tests for handling edge cases in query processing."""
     